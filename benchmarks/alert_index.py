@@ -0,0 +1,103 @@
+"""
+Cost of evaluating a price update against armed alerts.
+
+Fills ``AlertIndex`` with alerts spread over item keys and times
+``crossed`` for prices that cross no alert and a single alert, then checks
+that alerts are crossed in both directions only by strictly greater or
+lower prices.
+
+Usage:
+    python -m benchmarks.alert_index [--keys N]
+"""
+
+import argparse
+import random
+import timeit
+
+from bot.alerts import AlertIndex, AlertType
+
+SIZES = (1_000, 10_000, 100_000)
+CALLS = 20_000
+# Take profits are armed above and stop losses below the current price
+PRICE = 500.0
+
+
+def fill(size: int, keys: int, rng: random.Random) -> AlertIndex:
+    index = AlertIndex()
+    for item_id in range(size):
+        alert_type = rng.choice(list(AlertType))
+        if alert_type is AlertType.TAKE_PROFIT:
+            threshold = round(rng.uniform(PRICE, 2 * PRICE), 2)
+        else:
+            threshold = round(rng.uniform(1, PRICE), 2)
+        key = (f"Item {rng.randrange(keys)}", "USD")
+        index.add(item_id, key, threshold, alert_type)
+    return index
+
+
+def check_crossing() -> None:
+    key = ("Item", "USD")
+    index = AlertIndex()
+    index.add(1, key, 10.0, AlertType.TAKE_PROFIT)
+    index.add(2, key, 5.0, AlertType.STOP_LOSS)
+    # Prices equal to thresholds cross nothing
+    assert index.crossed(key, 10.0) == []
+    assert index.crossed(key, 5.0) == []
+    assert index.crossed(key, 7.5) == []
+    assert index.crossed(key, 10.01) == [(1, AlertType.TAKE_PROFIT)]
+    assert index.crossed(key, 4.99) == [(2, AlertType.STOP_LOSS)]
+    # Crossed alerts are disarmed
+    assert index.crossed(key, 100.0) == [] and len(index) == 0
+
+    index.add(1, key, 10.0, AlertType.TAKE_PROFIT)
+    index.add(2, key, 10.0, AlertType.TAKE_PROFIT)
+    index.add(3, key, 20.0, AlertType.TAKE_PROFIT)
+    index.add(4, key, 10.0, AlertType.STOP_LOSS)
+    index.add(5, key, 15.0, AlertType.STOP_LOSS)
+    assert sorted(index.crossed(key, 15.0)) == [
+        (1, AlertType.TAKE_PROFIT),
+        (2, AlertType.TAKE_PROFIT),
+    ]
+    assert index.crossed(key, 10.0) == [(5, AlertType.STOP_LOSS)]
+    assert index.crossed(("Item", "EUR"), 0.0) == []
+    assert len(index) == 2
+    print("Crossing checks passed")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--keys", type=int, default=1_000, help="items with alerts"
+    )
+    args = parser.parse_args()
+
+    check_crossing()
+    for size in SIZES:
+        rng = random.Random(size)
+        index = fill(size, args.keys, rng)
+        keys = [(f"Item {i}", "USD") for i in range(args.keys)]
+        quiet = [(key, PRICE) for key in keys]
+        calls = iter(quiet * (CALLS // len(quiet) + 1))
+        seconds = timeit.timeit(
+            lambda: index.crossed(*next(calls)), number=CALLS
+        )
+        quiet_us = seconds / CALLS * 1e6
+
+        # A price above every threshold crosses the take profit alert of
+        # one item, which is armed again for the next call
+        key = ("Crossed", "USD")
+
+        def cross():
+            index.add(-1, key, 1.0, AlertType.TAKE_PROFIT)
+            index.crossed(key, 2.0)
+
+        seconds = timeit.timeit(cross, number=CALLS)
+        print(
+            f"{size:>7} alerts: {quiet_us:.2f} us per update without "
+            f"crossed alerts, {seconds / CALLS * 1e6:.2f} us per update "
+            f"with one crossed alert"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Query plans of deal queries before and after the composite deal indexes.
+
+Seeds synthetic clients, items, deals, prices and positions into an empty
+database, runs EXPLAIN ANALYZE of the queries at the revision before the
+indexes, migrates and runs them again. Runs on the database from the usual
+POSTGRES_* settings and refuses to touch a database that has clients.
+
+Usage:
+    python -m benchmarks.deal_indexes [--clients N] [--items N]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import Executable, func, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+import bot.db
+from bot.db import Deal, async_engine
+from bot.db.data_helper import get_stats_data, tracking_records_query
+
+# Revision before the composite deal indexes and the one that adds them
+BEFORE = "de0f0d0fdedf"
+AFTER = "9c41e7b2a0d3"
+# Alembic config and migrations of the bot database
+DB_DIR = Path(bot.db.__file__).parent
+
+CURRENCIES = ("USD", "EUR", "RUB", "UAH")
+
+SEED = (
+    """
+    INSERT INTO search_items (name, image_url)
+    SELECT 'Item ' || n, 'https://example.com/' || n
+    FROM generate_series(1, CAST(:names AS integer)) n
+    """,
+    """
+    INSERT INTO prices (name, price, currency, updated)
+    SELECT 'Item ' || n, round((random() * 100)::numeric, 2), currency,
+        now()
+    FROM generate_series(1, CAST(:names AS integer)) n,
+        unnest(CAST(:currencies AS varchar[])) currency
+    """,
+    """
+    INSERT INTO clients (name, chat_id, currency, item_limit, lang)
+    SELECT 'client ' || i, i,
+        (CAST(:currencies AS varchar[]))[1 + i % 4], 96, 'EN'
+    FROM generate_series(1, CAST(:clients AS integer)) i
+    """,
+    """
+    INSERT INTO items (
+        client_id, name, app_id, app_name, count, profit_notify, loss_notify
+    )
+    SELECT id, 'Item ' || (1 + (id * 37 + k) % :names), 730, 'CSGO', 0,
+        false, false
+    FROM clients, generate_series(1, CAST(:items AS integer)) k
+    """,
+    # Every fifth item is closed and one deal of ten is in another currency
+    """
+    INSERT INTO deals (
+        client_id, item_id, deal_type, price, volume, deal_currency, date,
+        closed
+    )
+    SELECT items.client_id, items.id,
+        CASE WHEN d <= :deals * 2 / 3 THEN 'buy' ELSE 'sell' END,
+        round((random() * 100)::numeric, 2), 1 + d % 3,
+        CASE WHEN random() < 0.1
+            THEN (CAST(:currencies AS varchar[]))[1 + (items.id + d) % 4]
+            ELSE clients.currency
+        END,
+        now() - d * interval '1 day', items.id % 5 = 0
+    FROM items
+    JOIN clients ON clients.id = items.client_id,
+        generate_series(1, CAST(:deals AS integer)) d
+    """,
+    """
+    UPDATE items
+    SET count = greatest(volumes.count, 0)
+    FROM (
+        SELECT item_id,
+            sum(CASE WHEN deal_type = 'buy' THEN volume ELSE -volume END)
+                AS count
+        FROM deals
+        WHERE NOT closed
+        GROUP BY item_id
+    ) volumes
+    WHERE items.id = volumes.item_id
+    """,
+    """
+    INSERT INTO positions (
+        client_id, item_id, currency, name, count, buy_volume, buy_cost,
+        first_buy_date
+    )
+    SELECT deals.client_id, deals.item_id, deals.deal_currency, items.name,
+        items.count, sum(deals.volume), sum(deals.price * deals.volume),
+        min(deals.date)
+    FROM deals
+    JOIN items ON items.id = deals.item_id
+    WHERE NOT deals.closed AND deals.deal_type = 'buy'
+    GROUP BY deals.client_id, deals.item_id, deals.deal_currency,
+        items.name, items.count
+    """,
+)
+
+
+def alembic_config() -> Config:
+    config = Config(str(DB_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(DB_DIR / "migrations"))
+    return config
+
+
+async def migrate(connection: AsyncConnection, revision: str) -> None:
+    current = None
+    if await connection.scalar(text("SELECT to_regclass('alembic_version')")):
+        current = await connection.scalar(
+            text("SELECT version_num FROM alembic_version")
+        )
+    await connection.commit()
+    # Migrations run their own event loop
+    if current == AFTER and revision == BEFORE:
+        await asyncio.to_thread(command.downgrade, alembic_config(), revision)
+    else:
+        await asyncio.to_thread(command.upgrade, alembic_config(), revision)
+
+
+class _StatementCapture:
+    """Session stand-in that keeps the statement instead of running it."""
+
+    statement: Executable
+
+    async def execute(self, statement):
+        self.statement = statement
+        return self
+
+    def all(self) -> list:
+        return []
+
+
+async def make_queries(connection: AsyncConnection) -> dict[str, Executable]:
+    client_id, currency = (
+        await connection.execute(
+            select(Deal.client_id, Deal.deal_currency)
+            .group_by(Deal.client_id, Deal.deal_currency)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+    ).one()
+    item_id = await connection.scalar(
+        select(Deal.item_id)
+        .where(Deal.client_id == client_id, ~Deal.closed)
+        .limit(1)
+    )
+    stats = _StatementCapture()
+    await get_stats_data(client_id, currency, stats)
+    # Same as the profile route and the create_deal update of the mini app
+    open_items = (
+        select(Deal.item_id)
+        .where(Deal.client_id == client_id, Deal.closed == False)  # noqa: E712
+        .group_by(Deal.item_id)
+    )
+    return {
+        "get_stats_data": stats.statement,
+        "get_tracking_records": tracking_records_query(),
+        "profile open items count": select(func.count()).select_from(
+            open_items.subquery()
+        ),
+        "create_deal close update": update(Deal)
+        .where(Deal.item_id == item_id)
+        .where(Deal.client_id == client_id)
+        .where(~Deal.closed)
+        .values(closed=True),
+    }
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", ()):
+        names |= _index_names(child)
+    return names
+
+
+async def explain(
+    connection: AsyncConnection, statement: Executable, runs: int
+) -> tuple[float, set[str]]:
+    """Median execution time in ms and indexes used by the statement."""
+    sql = statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    times, indexes = [], set()
+    for _ in range(runs):
+        # Updates are rolled back, so every run sees the same rows
+        transaction = await connection.begin()
+        result = await connection.scalar(
+            text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+        )
+        await transaction.rollback()
+        (plan,) = json.loads(result) if isinstance(result, str) else result
+        times.append(plan["Execution Time"])
+        indexes |= _index_names(plan["Plan"])
+    return statistics.median(times), indexes
+
+
+async def explain_all(
+    connection: AsyncConnection, runs: int
+) -> dict[str, tuple[float, set[str]]]:
+    await connection.execute(text("ANALYZE"))
+    await connection.commit()
+    queries = await make_queries(connection)
+    await connection.commit()
+    return {
+        name: await explain(connection, statement, runs)
+        for name, statement in queries.items()
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with async_engine.connect() as connection:
+        await migrate(connection, BEFORE)
+        if await connection.scalar(text("SELECT count(*) FROM clients")):
+            raise SystemExit("Benchmark needs a database without clients")
+        params = {
+            "clients": args.clients,
+            "items": args.items,
+            "deals": args.deals,
+            "names": args.names,
+            "currencies": list(CURRENCIES),
+        }
+        for statement in SEED:
+            statement = text(statement)
+            await connection.execute(
+                statement,
+                {
+                    name: value
+                    for name, value in params.items()
+                    if name in statement.compile().params
+                },
+            )
+        await connection.commit()
+        deals = await connection.scalar(text("SELECT count(*) FROM deals"))
+        print(f"Seeded [{args.clients}] clients and [{deals}] deals")
+
+        before = await explain_all(connection, args.runs)
+        await migrate(connection, AFTER)
+        after = await explain_all(connection, args.runs)
+
+    for name in before:
+        (before_ms, before_indexes), (after_ms, after_indexes) = (
+            before[name],
+            after[name],
+        )
+        print(f"\n{name}: {before_ms:.2f} ms -> {after_ms:.2f} ms")
+        print(f"  before: {', '.join(sorted(before_indexes)) or 'no index'}")
+        print(f"  after:  {', '.join(sorted(after_indexes)) or 'no index'}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--items", type=int, default=25, help="per client")
+    parser.add_argument("--deals", type=int, default=6, help="per item")
+    parser.add_argument("--names", type=int, default=5_000)
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    run()
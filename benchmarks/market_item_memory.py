@@ -0,0 +1,132 @@
+"""
+Memory footprint of market items before and after slotted dataclasses.
+
+Builds ``N`` items in every currency with a parsed market price, the
+way the price worker does for a run, and reports the memory allocated per
+item by the old dict-backed dataclasses and the current slotted ones.
+
+Usage:
+    python -m benchmarks.market_item_memory [--count N]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable
+
+from price_worker.models import Currency, MarketItem, PriceResponse
+from price_worker.price_parser import parse_price
+
+
+@dataclass
+class LegacyPriceResponse:
+    lowest_price: str | None = None
+    median_price: str | None = None
+    success: bool | None = None
+    volume: str | None = None
+
+
+@dataclass
+class LegacyMarketItem:
+    """``MarketItem`` before it was made frozen and slotted."""
+
+    name: str
+    currency: Currency
+    price: LegacyPriceResponse | None = None
+    value: Decimal | None = field(default=None, compare=False)
+
+    def set_price(self, price: LegacyPriceResponse) -> None:
+        self.price = price
+        self.value = parse_price(price.lowest_price, self.currency)
+
+
+PRICES = {
+    Currency.USD: "${}.{:02}",
+    Currency.EUR: "{},{:02}€",
+    Currency.RUB: "{},{:02} pуб.",
+    Currency.UAH: "{},{:02}₴",
+}
+
+
+def price_string(currency: Currency, i: int) -> str:
+    return PRICES[currency].format(i % 1000, i % 100)
+
+
+def name(i: int) -> str:
+    # Names are built for every currency as they come from separate rows
+    return "".join(["StatTrak™ AK-47 | Redline (Field-Tested) #", str(i)])
+
+
+def legacy_items(count: int) -> list:
+    items = []
+    for currency in Currency:
+        for i in range(count):
+            item = LegacyMarketItem(name=name(i), currency=currency)
+            item.set_price(
+                LegacyPriceResponse(
+                    lowest_price=price_string(currency, i),
+                    success=True,
+                    volume=str(i),
+                )
+            )
+            items.append(item)
+    return items
+
+
+def slotted_items(count: int) -> list:
+    return [
+        MarketItem(name=name(i), currency=currency).with_price(
+            PriceResponse(
+                lowest_price=price_string(currency, i),
+                success=True,
+                volume=str(i),
+            )
+        )
+        for currency in Currency
+        for i in range(count)
+    ]
+
+
+def measure(build: Callable[[int], list], count: int) -> float:
+    """Bytes allocated per item that are still held by the items."""
+    gc.collect()
+    tracemalloc.start()
+    items = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=25_000)
+    args = parser.parse_args()
+
+    total = args.count * len(Currency)
+    for title, build in (
+        ("dict-backed", legacy_items),
+        ("slotted", slotted_items),
+    ):
+        per_item = measure(build, args.count)
+        print(
+            f"{title}: {per_item:.0f} bytes per item with its price, "
+            f"{per_item * total / 2**20:.1f} MiB for {total} items"
+        )
+    for title, cls in (
+        ("dict-backed", LegacyMarketItem),
+        ("slotted", MarketItem),
+    ):
+        per_item = measure(
+            lambda count: [
+                cls(name="item", currency=Currency.USD) for _ in range(count)
+            ],
+            total,
+        )
+        # Without the list slot that holds the item
+        print(f"{title}: {per_item - 8:.0f} bytes per bare item")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Throughput of Steam price parsing.
+
+Usage:
+    python -m benchmarks.price_parser [--count N]
+"""
+
+import argparse
+import random
+import timeit
+from decimal import Decimal
+
+from price_worker.models import Currency
+from price_worker.price_parser import parse_price
+from tests.test_price_parser import FuzzTest, format_price
+
+
+def make_prices(count: int) -> list[tuple[str, Currency]]:
+    rng = random.Random(2026)
+    prices = []
+    for _ in range(count):
+        currency = rng.choice(list(FuzzTest.FORMATS))
+        price_format = rng.choice(FuzzTest.FORMATS[currency])
+        value = Decimal(rng.randrange(10**7)) / 100
+        text = format_price(value, dashes=rng.random() < 0.3, **price_format)
+        prices.append((text, currency))
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    prices = make_prices(args.count)
+    for currency in Currency:
+        sample = [price for price in prices if price[1] is currency]
+        seconds = min(
+            timeit.repeat(
+                lambda: [parse_price(*price) for price in sample],
+                number=1,
+                repeat=5,
+            )
+        )
+        print(
+            f"{currency.name}: {len(sample) / seconds:,.0f} prices/s "
+            f"({seconds / len(sample) * 1e6:.2f} us per price)"
+        )
+    seconds = min(
+        timeit.repeat(
+            lambda: [parse_price(*price) for price in prices],
+            number=1,
+            repeat=5,
+        )
+    )
+    print(f"all: {len(prices) / seconds:,.0f} prices/s")
+
+
+if __name__ == "__main__":
+    main()
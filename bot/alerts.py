@@ -0,0 +1,309 @@
+import asyncio
+import json
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from enum import Enum
+from typing import Self
+
+from sqlalchemy import ColumnElement, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from telegram import Bot, ReplyKeyboardRemove
+from telegram.ext import Application
+
+from bot import constants, messages, utils
+from bot.db import (
+    PRICE_UPDATES_CHANNEL,
+    Client,
+    Item,
+    create_listener,
+    get_async_session,
+)
+from bot.logger import log
+from bot.rate_limiter import SEND_RATE_LIMITER, SendRateLimiter
+
+AlertKey = tuple[str, str]
+# Item name, threshold and current price
+ReachedAlert = tuple[str, float, float]
+# Chat id, language and currency of a client
+Recipient = tuple[int, str, str]
+
+
+class AlertType(Enum):
+    """Direction of a price alert, values match ``NOTIFY_TYPES``."""
+
+    TAKE_PROFIT = constants.NOTIFY_TYPES[0]
+    STOP_LOSS = constants.NOTIFY_TYPES[1]
+
+    @property
+    def threshold(self) -> InstrumentedAttribute:
+        if self is AlertType.TAKE_PROFIT:
+            return Item.take_profit
+        return Item.stop_loss
+
+    @property
+    def flag(self) -> InstrumentedAttribute:
+        if self is AlertType.TAKE_PROFIT:
+            return Item.profit_notify
+        return Item.loss_notify
+
+    @property
+    def reached_message(self) -> dict[str, str]:
+        if self is AlertType.TAKE_PROFIT:
+            return messages.notify_take_profit_reached
+        return messages.notify_stop_loss_reached
+
+    def is_crossed(self, price: ColumnElement) -> ColumnElement[bool]:
+        if self is AlertType.TAKE_PROFIT:
+            return price > self.threshold
+        return price < self.threshold
+
+
+class AlertIndex:
+    """
+    Armed price alerts of ``(item name, currency)``.
+
+    Thresholds of a key are kept sorted by alert type, so alerts crossed by
+    a new price are found with a binary search instead of scanning all
+    items: take profits below the price and stop losses above it.
+    """
+
+    def __init__(self):
+        self._thresholds: dict[AlertType, dict[AlertKey, list[float]]] = {
+            alert_type: {} for alert_type in AlertType
+        }
+        self._item_ids: dict[AlertType, dict[AlertKey, list[int]]] = {
+            alert_type: {} for alert_type in AlertType
+        }
+        self._alerts: dict[tuple[int, AlertType], tuple[AlertKey, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def add(
+        self,
+        item_id: int,
+        key: AlertKey,
+        threshold: float,
+        alert_type: AlertType = AlertType.TAKE_PROFIT,
+    ) -> None:
+        """Arm alert of the item, replacing its previous threshold."""
+        self.remove(item_id, alert_type)
+        thresholds = self._thresholds[alert_type].setdefault(key, [])
+        i = bisect_left(thresholds, threshold)
+        thresholds.insert(i, threshold)
+        self._item_ids[alert_type].setdefault(key, []).insert(i, item_id)
+        self._alerts[(item_id, alert_type)] = (key, threshold)
+
+    def remove(
+        self, item_id: int, alert_type: AlertType = AlertType.TAKE_PROFIT
+    ) -> None:
+        if (item_id, alert_type) not in self._alerts:
+            return
+        key, threshold = self._alerts.pop((item_id, alert_type))
+        thresholds = self._thresholds[alert_type][key]
+        item_ids = self._item_ids[alert_type][key]
+        i = bisect_left(thresholds, threshold)
+        while item_ids[i] != item_id:
+            i += 1
+        del thresholds[i], item_ids[i]
+        if not thresholds:
+            del self._thresholds[alert_type][key]
+            del self._item_ids[alert_type][key]
+
+    def _pop(self, alert_type: AlertType, key: AlertKey, s: slice) -> list:
+        thresholds = self._thresholds[alert_type][key]
+        item_ids = self._item_ids[alert_type][key][s]
+        del thresholds[s], self._item_ids[alert_type][key][s]
+        if not thresholds:
+            del self._thresholds[alert_type][key]
+            del self._item_ids[alert_type][key]
+        for item_id in item_ids:
+            del self._alerts[(item_id, alert_type)]
+        return [(item_id, alert_type) for item_id in item_ids]
+
+    def crossed(
+        self, key: AlertKey, price: float
+    ) -> list[tuple[int, AlertType]]:
+        """Disarm and return alerts of all types crossed by the price."""
+        crossed = []
+        take_profits = self._thresholds[AlertType.TAKE_PROFIT].get(key)
+        if take_profits and take_profits[0] < price:
+            i = bisect_left(take_profits, price)
+            crossed += self._pop(AlertType.TAKE_PROFIT, key, slice(None, i))
+        stop_losses = self._thresholds[AlertType.STOP_LOSS].get(key)
+        if stop_losses and stop_losses[-1] > price:
+            i = bisect_right(stop_losses, price)
+            crossed += self._pop(AlertType.STOP_LOSS, key, slice(i, None))
+        return crossed
+
+    @classmethod
+    async def load(cls, session: AsyncSession) -> Self:
+        index = cls()
+        for alert_type in AlertType:
+            alerts = await session.execute(
+                select(
+                    Item.id, Item.name, Client.currency, alert_type.threshold
+                ).where(
+                    Client.id == Item.client_id,
+                    alert_type.flag.is_(True),
+                    alert_type.threshold.is_not(None),
+                )
+            )
+            for item_id, name, currency, threshold in alerts:
+                index.add(item_id, (name, currency), threshold, alert_type)
+        return index
+
+
+async def send_alert_notifications(
+    bot: Bot,
+    notifications: dict[Recipient, dict[AlertType, list[ReachedAlert]]],
+    limiter: SendRateLimiter,
+):
+    """
+    Send reached alerts concurrently within Telegram rate limits.
+
+    Every client gets a single message with the alerts of both types.
+
+    Args:
+        bot (Bot): telegram bot
+        notifications: reached alerts by type of every client
+        limiter (SendRateLimiter): limiter shared by all senders
+    """
+
+    async def send(chat_id: int, message: str):
+        async with limiter.limit(chat_id):
+            try:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=message,
+                    reply_markup=ReplyKeyboardRemove(),
+                )
+            except Exception:
+                log.info(f"Failed to send message to chat [{chat_id}]")
+
+    messages_to_send = []
+    for (chat_id, lang, currency), alerts in notifications.items():
+        sections = []
+        for alert_type in AlertType:
+            if not (items := sorted(alerts.get(alert_type, ()))):
+                continue
+            items_str = "\n".join(
+                f"{i + 1}) `{utils.get_short_name(name)}`:\n`{round(threshold, 2)} {currency}` ⇒ "
+                f"`{round(price, 2)} {currency}`"
+                for i, (name, threshold, price) in enumerate(items)
+            )
+            sections.append(f"{alert_type.reached_message[lang]}{items_str}")
+        messages_to_send.append(send(chat_id, "\n\n".join(sections)))
+
+    await asyncio.gather(*messages_to_send)
+
+
+class AlertListener:
+    """
+    Evaluates price alerts as soon as new prices are written.
+
+    The price worker sends updated prices to ``PRICE_UPDATES_CHANNEL``,
+    every notification is checked against the alert index and the crossed
+    alerts are sent right away.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        index: AlertIndex,
+        limiter: SendRateLimiter = SEND_RATE_LIMITER,
+    ):
+        self.bot = bot
+        self.index = index
+        self.limiter = limiter
+        self._listener = create_listener(
+            PRICE_UPDATES_CHANNEL, self._on_notification
+        )
+        self._tasks: set[asyncio.Task] = set()
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_notification(self, payload: str) -> None:
+        crossed = {}
+        for name, currency, price in json.loads(payload):
+            for alert in self.index.crossed((name, currency), price):
+                crossed[alert] = price
+        if crossed:
+            self._spawn(self.notify(crossed))
+
+    async def notify(self, crossed: dict[tuple[int, AlertType], float]):
+        """Turn off crossed alerts and send them to clients."""
+        notifications = defaultdict(lambda: defaultdict(list))
+        async with get_async_session() as session:
+            for alert_type in AlertType:
+                prices = {
+                    item_id: price
+                    for (item_id, crossed_type), price in crossed.items()
+                    if crossed_type is alert_type
+                }
+                if prices:
+                    await self._disarm(
+                        session, alert_type, prices, notifications
+                    )
+        await send_alert_notifications(self.bot, notifications, self.limiter)
+
+    @staticmethod
+    async def _disarm(
+        session: AsyncSession,
+        alert_type: AlertType,
+        prices: dict[int, float],
+        notifications: dict[Recipient, dict[AlertType, list[ReachedAlert]]],
+    ):
+        # Alerts that were changed or sent by the job in the meantime
+        # are not returned
+        rows = await session.execute(
+            update(Item)
+            .where(
+                Client.id == Item.client_id,
+                Item.id.in_(prices),
+                alert_type.flag.is_(True),
+            )
+            .values({alert_type.flag: False})
+            .returning(
+                Item.id,
+                Item.name,
+                alert_type.threshold,
+                Client.chat_id,
+                Client.lang,
+                Client.currency,
+            )
+        )
+        for item_id, name, threshold, chat_id, lang, currency in rows:
+            notifications[(chat_id, lang, currency)][alert_type].append(
+                (name, threshold, prices[item_id])
+            )
+
+    async def start(self) -> None:
+        await self._listener.start()
+
+    async def close(self) -> None:
+        await self._listener.stop()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def start_alert_listener(application: Application) -> None:
+    async with get_async_session() as session:
+        index = await AlertIndex.load(session)
+    listener = AlertListener(application.bot, index)
+    await listener.start()
+    application.bot_data[constants.ALERTS] = listener
+    log.info(f"Listening to price updates with [{len(index)}] alerts")
+
+
+async def stop_alert_listener(application: Application) -> None:
+    listener: AlertListener | None = application.bot_data.pop(
+        constants.ALERTS, None
+    )
+    if listener is not None:
+        await listener.close()
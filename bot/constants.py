@@ -27,8 +27,11 @@ ITEMS = "items"
 ITEM_COUNT = "items_count"  # Item count
 PAGE_NUM = "page_num"  # Current page
 AVG_PRICE = "avg_price"  # Average buy price
+NOTIFY_TYPE = "notify_type"  # Chosen notification type
 PAGE_COUNT = "page_count"  # Page count
 PAGES = "pages"  # List of lists with items (pages)
+# Keys for bot_data dict
+ALERTS = "alerts"  # Take profit alerts listener
 
 CURRENCY = ("USD", "EUR", "RUB", "UAH")
 
@@ -1,24 +1,30 @@
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Callable
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 
 import bot.settings as settings
 from .data_helper import (
+    apply_deal_to_positions,
+    get_price_history,
     get_stats_data,
     get_tracking_records,
     get_tracking_records_for_user,
+    insert_tracking_records,
 )
+from .listener import Listener
 from .models import (
     Base,
     Client,
     Deal,
     Item,
+    Position,
     Skin,
     Container,
     Tool,
     Price,
     PriceLimit,
+    PriceHistory,
     Sticker,
     Agent,
     TrackingRecord,
@@ -30,6 +36,13 @@ DB_ADDR = (
     f"{settings.POSTGRES_HOST}/{settings.POSTGRES_DB}"
 )
 
+# Channel where the price worker sends updated prices
+PRICE_UPDATES_CHANNEL = "price_updates"
+# Channel where the search items worker announces new items
+SEARCH_ITEMS_CHANNEL = "search_items"
+# Channel where the bot announces chat ids of clients with new settings
+CLIENT_UPDATES_CHANNEL = "client_updates"
+
 async_engine = create_async_engine(
     DB_ADDR, echo=False, pool_pre_ping=True, pool_size=20, max_overflow=20
 )
@@ -48,24 +61,45 @@ async def get_async_session(**kwargs) -> AsyncGenerator[AsyncSession, Any]:
         await session.close()
 
 
+def create_listener(
+    channel: str,
+    callback: Callable[[str], None],
+    on_reconnect: Callable[[], None] | None = None,
+) -> Listener:
+    """Listener of a notifications channel of the bot database."""
+    return Listener(
+        DB_ADDR.replace("+asyncpg", ""), channel, callback, on_reconnect
+    )
+
+
 __all__ = (
     "Base",
     "Client",
     "Deal",
     "Item",
+    "Position",
     "Skin",
     "Container",
     "Tool",
     "Price",
     "PriceLimit",
+    "PriceHistory",
     "Sticker",
     "Agent",
     "TrackingRecord",
     "SearchItem",
     "get_async_session",
+    "create_listener",
+    "Listener",
     "DB_ADDR",
+    "PRICE_UPDATES_CHANNEL",
+    "SEARCH_ITEMS_CHANNEL",
+    "CLIENT_UPDATES_CHANNEL",
+    "apply_deal_to_positions",
+    "get_price_history",
     "get_stats_data",
     "get_tracking_data",
     "get_tracking_records",
+    "insert_tracking_records",
     "get_tracking_records_for_user",
 )
@@ -1,10 +1,35 @@
 from datetime import datetime, timedelta
 from typing import Sequence
 
-from sqlalchemy import select, func, case, Subquery, Numeric, Float
+from sqlalchemy import (
+    select,
+    func,
+    case,
+    delete,
+    update,
+    Numeric,
+    Float,
+    Select,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .models import Deal, Item, Client, Price, TrackingRecord, SearchItem
+from .models import (
+    Deal,
+    Item,
+    Client,
+    Position,
+    Price,
+    PriceHistory,
+    TrackingRecord,
+    SearchItem,
+)
+
+# Price history spans (days) that are returned without downsampling
+PRICE_HISTORY_RAW_SPAN = 2
+# Price history spans (days) that are downsampled to hourly prices,
+# longer spans are downsampled to daily prices
+PRICE_HISTORY_HOURLY_SPAN = 31
 
 
 async def get_stats_data(
@@ -83,55 +108,95 @@ async def get_stats_data(
     return (await session.execute(stats)).all()
 
 
-async def get_tracking_records(
-    session: AsyncSession,
-) -> list[tuple[int, str, float, float]]:
-    sub_query: Subquery = (
-        select(
-            Client.id.label("client_id"),
-            Client.currency,
-            (Item.count * Price.price).label("value"),
-            (
-                0.87 * Item.count * Price.price
-                - (
-                    Item.count
-                    * func.sum(Deal.price * Deal.volume)
-                    / func.sum(Deal.volume)
-                )
-            ).label("income"),
-        )
-        .where(
-            Client.id == Item.client_id,
-            Deal.client_id == Client.id,
-            Deal.deal_type == "buy",
-            Deal.closed.is_(False),
-            Deal.item_id == Item.id,
-            Item.name == Price.name,
-            Item.count > 0,
-            Deal.deal_currency == Price.currency,
-        )
-        .group_by(Client.id, Client.currency, Item.id, Item.name, Price.price)
-    ).subquery()
-
-    query = (
+def tracking_records_query() -> Select:
+    """Current value and income of every client that holds items."""
+    value = Position.count * Price.price
+    income = 0.87 * value - Position.count * (
+        Position.buy_cost / Position.buy_volume
+    )
+    return (
         select(
             Client.id,
             Client.currency,
-            func.round(func.sum(sub_query.c.value).cast(Numeric), 2)
+            func.round(func.sum(value).cast(Numeric), 2)
             .cast(Float)
             .label("value"),
-            func.round(func.sum(sub_query.c.income).cast(Numeric), 2)
+            func.round(func.sum(income).cast(Numeric), 2)
             .cast(Float)
             .label("income"),
         )
         .where(
-            Client.id == sub_query.c.client_id,
+            Client.id == Position.client_id,
+            Position.name == Price.name,
+            Position.currency == Price.currency,
+            Position.count > 0,
         )
         .group_by(Client.id, Client.currency)
         .order_by(Client.id)
     )
 
-    return (await session.execute(query)).all()
+
+async def get_tracking_records(
+    session: AsyncSession,
+) -> list[tuple[int, str, float, float]]:
+    return (await session.execute(tracking_records_query())).all()
+
+
+async def insert_tracking_records(session: AsyncSession) -> None:
+    """Snapshot value and income of all clients with one statement."""
+    await session.execute(
+        insert(TrackingRecord).from_select(
+            ["client_id", "currency", "value", "income"],
+            tracking_records_query(),
+        )
+    )
+
+
+async def apply_deal_to_positions(
+    deal: Deal, name: str, count: int, session: AsyncSession
+) -> None:
+    """
+    Update positions of the deal item with a new deal.
+
+    A buy deal adds its volume and cost to the position in the deal
+    currency. A deal that closes the item removes all its positions.
+
+    Args:
+        deal (Deal): deal that is being added
+        name (str): item full name
+        count (int): item count after the deal
+    """
+    if deal.closed:
+        await session.execute(
+            delete(Position).where(Position.item_id == deal.item_id)
+        )
+        return
+    if deal.deal_type == "buy":
+        stmt = insert(Position).values(
+            client_id=deal.client_id,
+            item_id=deal.item_id,
+            currency=deal.deal_currency,
+            name=name,
+            count=count,
+            buy_volume=deal.volume,
+            buy_cost=deal.price * deal.volume,
+            first_buy_date=deal.date,
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Position.item_id, Position.currency],
+                set_={
+                    "buy_volume": Position.buy_volume
+                    + stmt.excluded.buy_volume,
+                    "buy_cost": Position.buy_cost + stmt.excluded.buy_cost,
+                },
+            )
+        )
+    await session.execute(
+        update(Position)
+        .where(Position.item_id == deal.item_id)
+        .values(count=count)
+    )
 
 
 async def get_tracking_records_for_user(
@@ -150,3 +215,42 @@ async def get_tracking_records_for_user(
     ).all()
 
     return tracking_records
+
+
+async def get_price_history(
+    name: str, currency: str, span: int, session: AsyncSession
+) -> list[tuple[datetime, float]]:
+    """
+    Price of the item over the last ``span`` days.
+
+    Short spans are returned as is, longer ones are downsampled to hourly
+    and then daily average prices, so a chart gets a few hundred points
+    at most. Only the partitions of the span are scanned.
+
+    Returns:
+        list[tuple[datetime, float]]: ``(time, price)`` in time order
+    """
+    since = datetime.now() - timedelta(days=span)
+    if span <= PRICE_HISTORY_RAW_SPAN:
+        time, price = PriceHistory.measure_time, PriceHistory.price
+    else:
+        time = func.date_trunc(
+            "hour" if span <= PRICE_HISTORY_HOURLY_SPAN else "day",
+            PriceHistory.measure_time,
+        )
+        price = func.round(func.avg(PriceHistory.price).cast(Numeric), 2).cast(
+            Float
+        )
+    query = (
+        select(time.label("time"), price.label("price"))
+        .where(
+            PriceHistory.name == name,
+            PriceHistory.currency == currency,
+            PriceHistory.measure_time >= since,
+        )
+        .order_by(time)
+    )
+    if span > PRICE_HISTORY_RAW_SPAN:
+        query = query.group_by(time)
+
+    return (await session.execute(query)).all()
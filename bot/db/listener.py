@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from typing import Callable
+
+import asyncpg
+
+# Seconds to wait before reconnecting a lost listener connection
+LISTENER_RECONNECT_DELAY = 5
+
+logger = logging.getLogger(__name__)
+
+
+class Listener:
+    """
+    Dedicated connection that listens to a notifications channel.
+
+    A connection that fails to open or is lost is reopened every
+    ``reconnect_delay`` seconds until the listener is stopped.
+    Notifications sent while there was no connection are lost, so
+    ``on_reconnect`` is called after the connection is reopened to let the
+    owner catch up.
+
+    Args:
+        dsn (str): asyncpg connection string
+        channel (str): channel to listen to
+        callback (Callable[[str], None]): called with every payload
+        on_reconnect (Callable[[], None]): called after a reconnect
+        reconnect_delay (float): seconds between connection attempts
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        callback: Callable[[str], None],
+        on_reconnect: Callable[[], None] | None = None,
+        reconnect_delay: float = LISTENER_RECONNECT_DELAY,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.callback = callback
+        self.on_reconnect = on_reconnect
+        self.reconnect_delay = reconnect_delay
+        self._connection: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            connection.add_termination_listener(self._on_termination)
+            await connection.add_listener(self.channel, self._on_notification)
+        except BaseException:
+            await connection.close()
+            raise
+        self._connection = connection
+
+    async def _reconnect(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError):
+                logger.warning(f"Failed to reconnect to [{self.channel}]")
+                continue
+            logger.info(f"Listening to [{self.channel}] again")
+            if self.on_reconnect is not None:
+                self.on_reconnect()
+            return
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.callback(payload)
+
+    def _on_termination(self, connection: asyncpg.Connection) -> None:
+        if not self._closed:
+            logger.warning(f"Connection listening to [{self.channel}] is lost")
+            self._task = asyncio.create_task(self._reconnect())
+
+    async def start(self) -> None:
+        """Start listening, retries in the background if it fails."""
+        try:
+            await self._connect()
+        except (OSError, asyncpg.PostgresError):
+            logger.warning(f"Failed to listen to [{self.channel}]")
+            self._task = asyncio.create_task(self._reconnect())
+
+    async def stop(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._connection is not None:
+            await self._connection.close()
@@ -0,0 +1,106 @@
+"""add composite deal indexes
+
+Revision ID: 9c41e7b2a0d3
+Revises: de0f0d0fdedf
+Create Date: 2026-10-18 17:12:05.418230
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c41e7b2a0d3"
+down_revision = "de0f0d0fdedf"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Indexes are built without locking writes, which can't be done
+    # inside a transaction
+    with op.get_context().autocommit_block():
+        # Buy and sell aggregates of client stats
+        op.create_index(
+            "ix_deals_client_id_deal_currency_deal_type_item_id",
+            "deals",
+            ["client_id", "deal_currency", "deal_type", "item_id"],
+            unique=False,
+            postgresql_include=["price", "volume", "date"],
+            postgresql_concurrently=True,
+        )
+        # Open deals of a client item
+        op.create_index(
+            "ix_deals_open_client_id_item_id",
+            "deals",
+            ["client_id", "item_id"],
+            unique=False,
+            postgresql_where=sa.text("NOT closed"),
+            postgresql_concurrently=True,
+        )
+        # Covered by the indexes above
+        op.drop_index(
+            "ix_deals_client_id",
+            table_name="deals",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_deals_deal_currency",
+            table_name="deals",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_deals_deal_type",
+            table_name="deals",
+            postgresql_concurrently=True,
+        )
+        # Covered by the name and currency constraint, ix_prices_id is kept
+        # because it is the only one that keeps price ids unique
+        op.drop_index(
+            "ix_prices_name",
+            table_name="prices",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_prices_name",
+            "prices",
+            ["name"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_deals_deal_type",
+            "deals",
+            ["deal_type"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_deals_deal_currency",
+            "deals",
+            ["deal_currency"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_deals_client_id",
+            "deals",
+            ["client_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_deals_open_client_id_item_id",
+            table_name="deals",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_deals_client_id_deal_currency_deal_type_item_id",
+            table_name="deals",
+            postgresql_concurrently=True,
+        )
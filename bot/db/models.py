@@ -7,10 +7,12 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
     func,
+    text,
     BigInteger,
 )
 from sqlalchemy.orm import relationship, DeclarativeBase, mapped_column
@@ -150,19 +152,36 @@ class Deal(Base):
     id = mapped_column(
         Integer, primary_key=True, autoincrement=True, unique=True
     )
-    client_id = mapped_column(
-        Integer, ForeignKey(Client.id), nullable=False, index=True
-    )
+    client_id = mapped_column(Integer, ForeignKey(Client.id), nullable=False)
     item_id = mapped_column(
         Integer, ForeignKey(Item.id), nullable=False, index=True
     )
-    deal_type = mapped_column(String, nullable=False, index=True)
+    deal_type = mapped_column(String, nullable=False)
     price = mapped_column(Float(precision=2), nullable=False)
     volume = mapped_column(Integer, nullable=False)
-    deal_currency = mapped_column(String, nullable=False, index=True)
+    deal_currency = mapped_column(String, nullable=False)
     date = mapped_column(DateTime, nullable=False)
     closed = mapped_column(Boolean, default=False)
 
+    __table_args__ = (
+        # Buy and sell aggregates of client stats
+        Index(
+            "ix_deals_client_id_deal_currency_deal_type_item_id",
+            "client_id",
+            "deal_currency",
+            "deal_type",
+            "item_id",
+            postgresql_include=["price", "volume", "date"],
+        ),
+        # Open deals of a client item
+        Index(
+            "ix_deals_open_client_id_item_id",
+            "client_id",
+            "item_id",
+            postgresql_where=text("NOT closed"),
+        ),
+    )
+
     def __init__(
         self,
         client_id,
@@ -184,6 +203,62 @@ class Deal(Base):
         self.closed = closed
 
 
+class Position(Base):
+    """
+    ORM-model for open positions.
+
+    A position sums up open buy deals of a client item in a deal currency.
+    It is updated together with deals, so holdings and cost basis are read
+    without aggregating deals.
+
+    Attributes:
+        client_id (int): client id (foreign key)
+        item_id (int): item id (foreign key)
+        currency (str): deal currency
+        name (str): item full name
+        count (int): current count in inventory
+        buy_volume (int): volume of open buy deals
+        buy_cost (float): cost of open buy deals
+        first_buy_date (DateTime): date of the first open buy deal
+    """
+
+    __tablename__ = "positions"
+    client_id = mapped_column(
+        Integer, ForeignKey(Client.id), nullable=False, index=True
+    )
+    item_id = mapped_column(Integer, ForeignKey(Item.id), primary_key=True)
+    currency = mapped_column(String, primary_key=True)
+    name = mapped_column(String, nullable=False)
+    count = mapped_column(Integer, nullable=False, default=0)
+    buy_volume = mapped_column(Integer, nullable=False, default=0)
+    buy_cost = mapped_column(Float, nullable=False, default=0.0)
+    first_buy_date = mapped_column(DateTime, nullable=False)
+
+    def __init__(
+        self,
+        client_id,
+        item_id,
+        currency,
+        name,
+        count,
+        buy_volume,
+        buy_cost,
+        first_buy_date,
+    ):
+        self.client_id = client_id
+        self.item_id = item_id
+        self.currency = currency
+        self.name = name
+        self.count = count
+        self.buy_volume = buy_volume
+        self.buy_cost = buy_cost
+        self.first_buy_date = first_buy_date
+
+    @property
+    def buy_price(self) -> float:
+        return self.buy_cost / self.buy_volume
+
+
 class Skin(Base):
     __tablename__ = "skins"
     id = mapped_column(
@@ -327,9 +402,7 @@ class Price(Base):
     id = mapped_column(
         Integer, primary_key=True, autoincrement=True, index=True, unique=True
     )
-    name = mapped_column(
-        String, nullable=False, index=True, unique=False, primary_key=True
-    )
+    name = mapped_column(String, nullable=False, primary_key=True)
     price = mapped_column(Float(precision=2), default=0.0)
     currency = mapped_column(
         String, default="USD", index=True, primary_key=True
@@ -348,20 +421,61 @@ class Price(Base):
 
 
 class PriceLimit(Base):
+    """
+    ORM-model for price limits.
+
+    Attributes:
+        currency (str): currency name
+        value (float): price limit in currency (equivalent of 2000 USD)
+        rate (float): exchange rate of currency to USD
+        updated (DateTime): last update date
+    """
+
     __tablename__ = "price_limits"
     id = mapped_column(
         Integer, primary_key=True, autoincrement=True, index=True, unique=True
     )
     currency = mapped_column(String, index=True, unique=True)
     value = mapped_column(Float(precision=2), default=0.0)
+    rate = mapped_column(Float, nullable=True, default=None)
     updated = mapped_column(DateTime, nullable=False)
 
-    def __init__(self, currency, value, updated):
+    def __init__(self, currency, value, updated, rate=None):
         self.currency = currency
         self.value = value
+        self.rate = rate
         self.updated = updated
 
 
+class PriceHistory(Base):
+    """
+    ORM-model for price history.
+
+    The table is partitioned by month of ``measure_time``, partitions are
+    created by the price worker before it appends prices to them.
+
+    Attributes:
+        name (str): item full name
+        currency (str): currency name
+        price (float): item price
+        measure_time (DateTime): price update date
+    """
+
+    __tablename__ = "price_history"
+    name = mapped_column(String, primary_key=True)
+    currency = mapped_column(String, primary_key=True)
+    measure_time = mapped_column(DateTime, primary_key=True)
+    price = mapped_column(Float(precision=2), nullable=False)
+
+    __table_args__ = ({"postgresql_partition_by": "RANGE (measure_time)"},)
+
+    def __init__(self, name, currency, price, measure_time):
+        self.name = name
+        self.currency = currency
+        self.price = price
+        self.measure_time = measure_time
+
+
 class TrackingRecord(Base):
     __tablename__ = "tracking_records"
 
@@ -1,14 +1,15 @@
 import gc
+from collections import defaultdict
 
-from sqlalchemy import select
-from telegram import ReplyKeyboardRemove
+from sqlalchemy import case, or_, select, update
 from telegram.ext import ContextTypes
 
-from bot import utils, messages
+from bot import constants, utils
+from bot.alerts import AlertType, send_alert_notifications
 from bot.db import get_async_session, Client, Item, Price
-from bot.db.data_helper import get_tracking_records
-from bot.db.models import TrackingRecord, PriceLimit
-from bot.logger import log
+from bot.db.data_helper import insert_tracking_records
+from bot.db.models import PriceLimit
+from bot.rate_limiter import SEND_RATE_LIMITER
 
 
 async def update_price_limits(context: ContextTypes.DEFAULT_TYPE):
@@ -31,73 +32,82 @@ def store_price_limits_in_bot_data(context: ContextTypes.DEFAULT_TYPE, limits):
 
 
 async def send_notifications(context: ContextTypes.DEFAULT_TYPE):
+    fired = {
+        alert_type: alert_type.flag.is_(True)
+        & alert_type.is_crossed(Price.price)
+        for alert_type in AlertType
+    }
+    # Armed alerts crossed in any direction, the rows are locked, so alerts
+    # sent by the listener in the meantime are checked again and skipped
+    crossed = (
+        select(
+            Item.id,
+            Price.price,
+            *(
+                condition.label(alert_type.name.lower())
+                for alert_type, condition in fired.items()
+            ),
+        )
+        .where(
+            Client.id == Item.client_id,
+            Item.name == Price.name,
+            Client.currency == Price.currency,
+            or_(*fired.values()),
+        )
+        .with_for_update(of=Item)
+        .cte("crossed")
+    )
+    fired_columns = [
+        crossed.c[alert_type.name.lower()] for alert_type in AlertType
+    ]
     async with get_async_session() as session:
-        take_profit_data = (
-            await session.execute(
-                select(
-                    Client.chat_id,
-                    Client.currency,
-                    Item.name,
-                    Item.take_profit,
-                    Price.price,
-                ).where(
-                    Client.id == Item.client_id,
-                    Item.name == Price.name,
-                    Price.price > Item.take_profit,
-                    Client.currency == Price.currency,
-                    Item.profit_notify.is_(True),
-                )
-            )
-        ).all()
-
-        for chat_id in set(j[0] for j in take_profit_data):
-            client = await session.scalar(
-                select(Client).where(Client.chat_id == chat_id)
+        rows = await session.execute(
+            update(Item)
+            .where(Item.id == crossed.c.id, Client.id == Item.client_id)
+            .values(
+                {
+                    alert_type.flag: case(
+                        (column, False), else_=alert_type.flag
+                    )
+                    for alert_type, column in zip(AlertType, fired_columns)
+                }
             )
-            items_data = [
-                i[1:]
-                for i in filter(lambda x: x[0] == chat_id, take_profit_data)
-            ]
-            items_str = "\n".join(
-                f"{i + 1}) `{utils.get_short_name(d[1])}`:\n`{round(d[2], 2)} {d[0]}` ⇒ "
-                f"`{round(d[3], 2)} {d[0]}`"
-                for i, d in enumerate(items_data)
+            .returning(
+                Item.id,
+                Item.name,
+                crossed.c.price,
+                Client.chat_id,
+                Client.lang,
+                Client.currency,
+                *(alert_type.threshold for alert_type in AlertType),
+                *fired_columns,
             )
-            message = f"{messages.notify_take_profit_reached[client.lang]}{items_str}"
+        )
+        disarmed = []
+        notifications = defaultdict(lambda: defaultdict(list))
+        for item_id, name, price, chat_id, lang, currency, *alerts in rows:
+            thresholds = alerts[: len(AlertType)]
+            is_fired = alerts[len(AlertType) :]
+            for alert_type, threshold, fired_now in zip(
+                AlertType, thresholds, is_fired
+            ):
+                if fired_now:
+                    disarmed.append((item_id, alert_type))
+                    notifications[(chat_id, lang, currency)][
+                        alert_type
+                    ].append((name, threshold, price))
 
-            # Sending message
-            try:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=message,
-                    reply_markup=ReplyKeyboardRemove(),
-                )
-            except Exception:
-                log.info(f"Failed to send message to chat [{chat_id}]")
+    if listener := context.bot_data.get(constants.ALERTS):
+        for item_id, alert_type in disarmed:
+            listener.index.remove(item_id, alert_type)
 
-            # Turning notification flag to False
-            client_items = (
-                await session.scalars(
-                    client.items.select().where(
-                        Item.name.in_(x[1] for x in items_data)
-                    )
-                )
-            ).all()
-            for item in client_items:
-                item.profit_notify = False
+    await send_alert_notifications(
+        context.bot, notifications, SEND_RATE_LIMITER
+    )
 
 
 async def update_tracking_records(context: ContextTypes.DEFAULT_TYPE):
     async with get_async_session() as session:
-        tracking_records = await get_tracking_records(session)
-        for client_id, currency, value, income in tracking_records:
-            session.add(
-                TrackingRecord(
-                    client_id=client_id,
-                    currency=currency,
-                    value=value,
-                    income=income,
-                )
-            )
+        await insert_tracking_records(session)
 
     gc.collect()
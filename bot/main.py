@@ -33,7 +33,8 @@ from bot import (
     settings,
     utils,
 )
-from bot.db import Client, Deal, Item
+from bot.alerts import start_alert_listener, stop_alert_listener
+from bot.db import CLIENT_UPDATES_CHANNEL, Client, Deal, Item, Position
 from bot.jobs import (
     update_price_limits,
     send_notifications,
@@ -98,6 +99,13 @@ async def choose_lang(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+async def notify_client_updated(client: Client, session: AsyncSession):
+    # Sent to the mini app API when the new settings are committed
+    await session.execute(
+        select(func.pg_notify(CLIENT_UPDATES_CHANNEL, str(client.chat_id)))
+    )
+
+
 @utils.inject_db_session_and_client
 async def update_currency(
     update: Update,
@@ -111,6 +119,7 @@ async def update_currency(
     reg_flag = context.user_data.pop(constants.REG_FLAG, None)
     if reg_flag:
         client.currency = currency
+        await notify_client_updated(client, session)
         await query.edit_message_text(
             messages.currency_update[client.lang].format(currency=currency)
         )
@@ -132,6 +141,7 @@ async def update_lang(
     reg_flag = context.user_data.get(constants.REG_FLAG, None)
     lang = query.data
     client.lang = lang
+    await notify_client_updated(client, session)
     if reg_flag:
         text = messages.reg_message[lang]
         await query.edit_message_text(
@@ -219,6 +229,9 @@ async def wipeout_sure(
     client: Client,
 ):
     query = update.callback_query
+    await session.execute(
+        delete(Position).where(Position.client_id == client.id)
+    )
     await session.execute(delete(Deal).where(Deal.client_id == client.id))
     await session.execute(delete(Item).where(Item.client_id == client.id))
     log.info(f"WIPEOUT -> user [{user.id}] deleted all his deals and items")
@@ -252,13 +265,16 @@ async def error(update: Update, context: ContextTypes.DEFAULT_TYPE):
 def run():
     defaults = Defaults(parse_mode=ParseMode.MARKDOWN)
 
-    bot = (
+    builder = (
         Application.builder()
         .token(settings.BOT_TOKEN)
         .defaults(defaults=defaults)
         .concurrent_updates(True)
-        .build()
     )
+    if ENVIRONMENT == "production":
+        builder.post_init(start_alert_listener)
+        builder.post_shutdown(stop_alert_listener)
+    bot = builder.build()
 
     if ENVIRONMENT == "production":
         job: JobQueue = bot.job_queue
@@ -307,7 +323,7 @@ def run():
                 CallbackQueryHandler(notifications.cancel, pattern=r"Cancel"),
                 MessageHandler(
                     filters.Regex(utils.notify_pattern),
-                    notifications.take_profit,
+                    notifications.set_price_alert,
                 ),
             ],
         },
@@ -349,7 +349,7 @@ notify_item_choose = {
     RU: "Вы выбрали `{item_name}`. Напишите цену в `{currency}`, при достижении которой "
     "вы хотите получить уведомление. Средняя цена покупки этого предмета равна "
     "`{avg_price} {currency}`.",
-    EN: "You choose `{ite_name}`. Now send price in `{currency}` for notification. "
+    EN: "You choose `{item_name}`. Now send price in `{currency}` for notification. "
     "Average buy price of that item is `{avg_price} {currency}`.",
 }
 
@@ -376,9 +376,22 @@ notify_take_profit_reached = {
     EN: "This item's take-profit price is reached (take profit price ⇒ current price):\n",
 }
 
-stop_loss_not_implemented = {
-    RU: "Функционал уведомлений по потерям ешё не реализован.",
-    EN: "Stop loss notifications not implemented yet.",
+notify_stop_loss_invalid = {
+    RU: "Цена для ограничения убытков должна быть меньше средней цены покупки предмета.",
+    EN: "Stop-loss price must be less than average buy price of item.",
+}
+
+notify_stop_loss_set = {
+    RU: "Для предмета `{item_name}` установлен порог ограничения убытков, равный `{price} "
+    "{currency}`. При падении цены ниже этого порога вы получите уведомление.",
+    EN: "Stop-loss price is set to `{price} {currency}` for the item `{item_name}`. "
+    "You will receive notification when price will fall below that value.",
+}
+
+notify_stop_loss_reached = {
+    RU: "По этим предметам цена опустилась ниже порога, установленного на цену "
+    "(пороговая цена ⇒ цена сейчас):\n",
+    EN: "This item's stop-loss price is reached (stop loss price ⇒ current price):\n",
 }
 
 wipeout_message = {
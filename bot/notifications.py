@@ -1,14 +1,14 @@
 import math
 import re
 
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from telegram import ReplyKeyboardRemove, Update, User
 from telegram.ext import ContextTypes
 
 from bot import messages, constants, utils
-from bot.db import Client, Item
+from bot.alerts import AlertType
+from bot.db import Client, Item, Position
 from bot.logger import log
 
 
@@ -59,17 +59,14 @@ async def choose_item(
     context.user_data[constants.ITEM_NAME] = item_name
 
     currency = client.currency
-    item: Item = await session.scalar(
-        client.items.select()
-        .where(Item.name == item_name)
-        .options(selectinload(Item.deals))
-    )
-
-    avg_price = round(
-        sum(map(lambda x: x.price * x.volume, item.deals))
-        / sum(map(lambda x: x.volume, item.deals)),
-        2,
+    # Items bought before the currency change have positions in other ones
+    position: Position = await session.scalar(
+        select(Position)
+        .where(Position.client_id == client.id, Position.name == item_name)
+        .order_by(desc(Position.currency == client.currency))
+        .limit(1)
     )
+    avg_price = round(position.buy_price, 2)
     context.user_data[constants.AVG_PRICE] = avg_price
     context.user_data[constants.CLIENT_CURRENCY] = currency
 
@@ -113,15 +110,7 @@ async def show_items(
     client: Client,
 ):
     query = update.callback_query
-
-    # TODO Implement Stop Loss notifications
-    if query.data == constants.NOTIFY_TYPES[1]:
-        await query.edit_message_text(
-            text=f"{messages.stop_loss_not_implemented[client.lang]}\n\n"
-            f"{messages.menu_message[client.lang]}",
-            reply_markup=utils.get_main_menu_inline_markup(),
-        )
-        return utils.State.MAIN_MENU
+    context.user_data[constants.NOTIFY_TYPE] = query.data
 
     items = list(
         map(
@@ -163,7 +152,7 @@ async def show_items(
 
 
 @utils.inject_db_session_and_client
-async def take_profit(
+async def set_price_alert(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     user: User,
@@ -177,15 +166,25 @@ async def take_profit(
         )
         return utils.State.NOTIFICATIONS
 
+    alert_type = AlertType(
+        context.user_data.get(constants.NOTIFY_TYPE, constants.NOTIFY_TYPES[0])
+    )
     item_price = update.message.text.replace(r",", r".")
     item_price = re.match(utils.notify_pattern, item_price).group()
     item_price = float(item_price)
-    if item_price <= context.user_data[constants.AVG_PRICE]:
+    avg_price = context.user_data[constants.AVG_PRICE]
+    if alert_type is AlertType.TAKE_PROFIT and item_price <= avg_price:
         await user.send_message(
             messages.notify_take_profit_invalid[client.lang],
             reply_markup=ReplyKeyboardRemove(),
         )
         return utils.State.NOTIFICATIONS
+    if alert_type is AlertType.STOP_LOSS and item_price >= avg_price:
+        await user.send_message(
+            messages.notify_stop_loss_invalid[client.lang],
+            reply_markup=ReplyKeyboardRemove(),
+        )
+        return utils.State.NOTIFICATIONS
 
     item = await session.scalar(
         client.items.select().where(
@@ -193,10 +192,20 @@ async def take_profit(
         )
     )
 
-    item.take_profit = item_price
-    item.profit_notify = True
+    if alert_type is AlertType.TAKE_PROFIT:
+        item.take_profit = item_price
+        item.profit_notify = True
+        message = messages.notify_take_profit_set
+    else:
+        item.stop_loss = item_price
+        item.loss_notify = True
+        message = messages.notify_stop_loss_set
+    if listener := context.bot_data.get(constants.ALERTS):
+        listener.index.add(
+            item.id, (item.name, client.currency), item_price, alert_type
+        )
 
-    m = messages.notify_take_profit_set[client.lang].format(
+    m = message[client.lang].format(
         price=item_price,
         item_name=context.user_data[constants.ITEM_NAME],
         currency=context.user_data[constants.CLIENT_CURRENCY],
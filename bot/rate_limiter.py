@@ -0,0 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from bot import settings
+
+
+class SendRateLimiter:
+    """
+    Spreads bot messages over time to stay within Telegram rate limits.
+
+    Every message reserves the earliest send time that keeps both the global
+    rate and the interval between messages to the same chat, so concurrent
+    senders wait for their slot instead of getting 429 responses.
+
+    Args:
+        rate (float): messages per second to all chats
+        chat_interval (float): seconds between messages to one chat
+    """
+
+    def __init__(
+        self,
+        rate: float = settings.BROADCAST_RATE,
+        chat_interval: float = settings.CHAT_MESSAGE_INTERVAL,
+    ):
+        self.interval = 1 / rate
+        self.chat_interval = chat_interval
+        self._next = 0.0
+        self._chat_next: dict[int, float] = {}
+
+    def _reserve(self, chat_id: int) -> float:
+        now = asyncio.get_running_loop().time()
+        if self._next < now:
+            # Nothing is waiting, intervals of earlier chats have passed
+            self._chat_next = {
+                chat: slot
+                for chat, slot in self._chat_next.items()
+                if slot > now
+            }
+        slot = max(now, self._next, self._chat_next.get(chat_id, 0.0))
+        self._next = slot + self.interval
+        self._chat_next[chat_id] = slot + self.chat_interval
+        return slot - now
+
+    @asynccontextmanager
+    async def limit(self, chat_id: int) -> AsyncIterator[None]:
+        await asyncio.sleep(self._reserve(chat_id))
+        yield
+
+
+# Shared by all senders of the bot, so limits hold across them
+SEND_RATE_LIMITER = SendRateLimiter()
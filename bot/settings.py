@@ -18,3 +18,8 @@ CHANNEL_ID = os.getenv("CHANNEL_ID")
 CURRENCY_API_KEY = os.getenv("CURRENCY_API_KEY")
 
 MINI_APP_URL = os.getenv("MINI_APP_URL")
+
+# Messages per second Telegram allows a bot to send to different chats
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", 30))
+# Seconds between messages that Telegram allows a bot to send to one chat
+CHAT_MESSAGE_INTERVAL = float(os.getenv("CHAT_MESSAGE_INTERVAL", 1))
@@ -237,15 +237,21 @@ async def update_price_limits() -> dict | None:
         async with get_async_session() as session:
             price_limits = (await session.scalars(select(PriceLimit))).all()
             for currency, rate in rates.items():
-                value = round(2000 * rate / rates["USD"], 2)
+                usd_rate = rate / rates["USD"]
+                value = round(2000 * usd_rate, 2)
                 price_limit = next(
                     filter(lambda p: p.currency == currency, price_limits),
                     None,
                 )
                 if price_limit is None:
-                    session.add(PriceLimit(currency, value, dt.datetime.now()))
+                    session.add(
+                        PriceLimit(
+                            currency, value, dt.datetime.now(), rate=usd_rate
+                        )
+                    )
                 else:
                     price_limit.value = value
+                    price_limit.rate = usd_rate
                     price_limit.updated = dt.datetime.now()
                 limits_to_return["price_limits"][currency] = value
         log.info("Price limits update is completed")
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+from collections.abc import Mapping
+
+from sqlalchemy import func, select
+
+from bot.db import (
+    SEARCH_ITEMS_CHANNEL,
+    Item,
+    SearchItem,
+    create_listener,
+    get_async_session,
+)
+from mini_app_api.catalog_file import (
+    read_catalog,
+    read_catalog_version,
+    write_catalog,
+)
+from mini_app_api.search_index import SearchIndex
+
+# Seconds between checks of the search items count
+CATALOG_POLL_INTERVAL = int(os.getenv("CATALOG_POLL_INTERVAL", 300))
+# Catalog file that is memory-mapped by every API worker
+CATALOG_FILE = os.getenv("CATALOG_FILE", "search-catalog.bin")
+
+logger = logging.getLogger("mini-app-api")
+
+
+async def get_existing_search_items() -> dict[str, str]:
+    async with get_async_session() as session:
+        existing_items = await session.scalars(select(SearchItem))
+    return {item.name: item.image_url for item in existing_items}
+
+
+async def get_search_items_count() -> int:
+    async with get_async_session() as session:
+        return await session.scalar(
+            select(func.count()).select_from(SearchItem)
+        )
+
+
+async def get_items_popularity() -> dict[str, int]:
+    """Number of clients that hold every item."""
+    async with get_async_session() as session:
+        rows = await session.execute(
+            select(Item.name, func.count(Item.client_id.distinct()))
+            .where(Item.count > 0)
+            .group_by(Item.name)
+        )
+    return dict(rows.all())
+
+
+class CatalogSnapshot:
+    """
+    Search items and their index at some version of the catalog.
+
+    Snapshots are never changed, a request that took a snapshot sees the
+    same items and index until it finishes.
+
+    Attributes:
+        version (int): number of search items when the snapshot was loaded
+        items (Mapping[str, str]): item name to image url
+        index (SearchIndex): search index of the items
+    """
+
+    __slots__ = ("version", "items", "index")
+
+    def __init__(
+        self, version: int, items: Mapping[str, str], index: SearchIndex
+    ):
+        self.version = version
+        self.items = items
+        self.index = index
+
+
+class Catalog:
+    """
+    Search items that are reloaded while the API is running.
+
+    New items are noticed by ``SEARCH_ITEMS_CHANNEL`` notifications of
+    search items worker and by polling the items count every
+    ``poll_interval`` seconds in case a notification was missed. The new
+    snapshot is built aside and swapped with a single assignment.
+
+    The catalog is kept in a file that every worker maps into memory, so
+    workers share one copy of it. The first worker that notices new items
+    rebuilds the file, the others map it as soon as its version matches the
+    number of items in the database.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = CATALOG_POLL_INTERVAL,
+        path: str = CATALOG_FILE,
+    ):
+        self.poll_interval = poll_interval
+        self.path = path
+        self.snapshot = CatalogSnapshot(0, {}, SearchIndex())
+        self._changed = asyncio.Event()
+        # Items added while reconnecting are checked after a reconnect
+        self._listener = create_listener(
+            SEARCH_ITEMS_CHANNEL,
+            lambda payload: self._changed.set(),
+            on_reconnect=self._changed.set,
+        )
+        self._task: asyncio.Task | None = None
+
+    def _map(self) -> None:
+        # Previous mappings are released once requests drop their snapshots
+        self.snapshot = CatalogSnapshot(*read_catalog(self.path))
+        logger.info(
+            f"Search catalog [{self.path}] is mapped "
+            f"with [{self.snapshot.version}] items"
+        )
+
+    async def reload(self) -> None:
+        items = await get_existing_search_items()
+        popularity = await get_items_popularity()
+        # The index is built in a thread to keep serving requests
+        index = await asyncio.to_thread(SearchIndex, items, popularity)
+        await asyncio.to_thread(write_catalog, self.path, len(items), index)
+        self._map()
+
+    async def refresh(self) -> None:
+        count = await get_search_items_count()
+        if count == self.snapshot.version:
+            return
+        if read_catalog_version(self.path) == count:
+            self._map()
+        else:
+            await self.reload()
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait(), timeout=self.poll_interval
+                )
+            except TimeoutError:
+                pass
+            self._changed.clear()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh search catalog")
+
+    async def start(self) -> None:
+        if read_catalog_version(self.path) is None:
+            await self.reload()
+        else:
+            # Items added since the file was written are picked up by
+            # the first refresh
+            self._map()
+        await self._listener.start()
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self._listener.stop()
+
+
+CATALOG = Catalog()
@@ -0,0 +1,259 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from typing import Iterable, Iterator
+
+from mini_app_api.search_index import SearchIndex
+
+MAGIC = b"TMCATLG2"
+# Magic, catalog version and number of sections
+HEADER = struct.Struct("<8sII")
+# Offset and size of a section
+SECTION = struct.Struct("<QQ")
+SECTIONS = (
+    "names",
+    "image_urls",
+    "lower_names",
+    "by_lower",
+    "rank",
+    "grams",
+    "posting_offsets",
+    "postings",
+    "tokens",
+    "token_ids",
+    "name_token_offsets",
+    "name_token_positions",
+)
+# Sections of string tables are stored as offsets followed by UTF-8 text
+STRING_SECTIONS = ("names", "image_urls", "lower_names", "grams", "tokens")
+
+
+class StringTable(Sequence[str]):
+    """Read-only list of strings stored as offsets and UTF-8 text."""
+
+    def __init__(self, data: memoryview):
+        (count,) = struct.unpack_from("<I", data)
+        self._offsets = data[4 : 8 + 4 * count].cast("I")
+        self._text = data[8 + 4 * count :]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return str(
+            self._text[self._offsets[i] : self._offsets[i + 1]], "utf-8"
+        )
+
+    @staticmethod
+    def pack(strings: Sequence[str]) -> bytes:
+        encoded = [string.encode() for string in strings]
+        offsets = array("I", [0])
+        for string in encoded:
+            offsets.append(offsets[-1] + len(string))
+        return (
+            struct.pack("<I", len(encoded))
+            + offsets.tobytes()
+            + b"".join(encoded)
+        )
+
+
+class PermutedTable(Sequence[str]):
+    """Strings of a table in the order of the given positions."""
+
+    def __init__(self, table: Sequence[str], order: Sequence[int]):
+        self._table = table
+        self._order = order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, i: int) -> str:
+        return self._table[self._order[i]]
+
+
+class TokenizedNames(Sequence[list[str]]):
+    """Tokens of names stored as positions in the sorted tokens table."""
+
+    def __init__(
+        self, tokens: StringTable, offsets: memoryview, positions: memoryview
+    ):
+        self._tokens = tokens
+        self._offsets = offsets
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> list[str]:
+        return [
+            self._tokens[position]
+            for position in self._positions[
+                self._offsets[i] : self._offsets[i + 1]
+            ]
+        ]
+
+
+class Postings:
+    """Trigram posting lists that are looked up in sorted trigrams."""
+
+    def __init__(
+        self, grams: StringTable, offsets: memoryview, postings: memoryview
+    ):
+        self._grams = grams
+        self._offsets = offsets
+        self._postings = postings
+
+    def get(self, gram: str, default=None) -> memoryview | None:
+        i = bisect_left(self._grams, gram)
+        if i == len(self._grams) or self._grams[i] != gram:
+            return default
+        return self._postings[self._offsets[i] : self._offsets[i + 1]]
+
+
+class CatalogItems(Mapping[str, str]):
+    """Item name to image url map over the sorted names of a catalog."""
+
+    def __init__(self, names: StringTable, image_urls: StringTable):
+        self._names = names
+        self._image_urls = image_urls
+
+    def _find(self, name: str) -> int | None:
+        i = bisect_left(self._names, name)
+        if i < len(self._names) and self._names[i] == name:
+            return i
+        return None
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._find(name) is not None
+
+    def __getitem__(self, name: str) -> str:
+        if (i := self._find(name)) is None:
+            raise KeyError(name)
+        return self._image_urls[i]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+
+def _pack_ints(values: Iterable[int]) -> bytes:
+    return array("I", values).tobytes()
+
+
+def write_catalog(path: str, version: int, index: SearchIndex) -> None:
+    """
+    Write the search index to a file that can be mapped by any process.
+
+    The file is written next to the target and renamed over it, so readers
+    map either the old or the new catalog and never a partial one.
+    """
+    tables = index.tables()
+    postings = tables["postings"]
+    grams = sorted(postings)
+    posting_offsets = array("I", [0])
+    for gram in grams:
+        posting_offsets.append(posting_offsets[-1] + len(postings[gram]))
+    # Tokens of a name are positions of its entries in the sorted tokens,
+    # so names are not split again when they are read
+    name_positions = [[] for _ in tables["names"]]
+    for position, i in enumerate(tables["token_ids"]):
+        name_positions[i].append(position)
+    name_token_offsets = array("I", [0])
+    for positions in name_positions:
+        name_token_offsets.append(name_token_offsets[-1] + len(positions))
+    sections = {
+        "names": StringTable.pack(tables["names"]),
+        "image_urls": StringTable.pack(tables["image_urls"]),
+        "lower_names": StringTable.pack(tables["lower_names"]),
+        "by_lower": _pack_ints(tables["by_lower"]),
+        "rank": _pack_ints(tables["rank"]),
+        "grams": StringTable.pack(grams),
+        "posting_offsets": posting_offsets.tobytes(),
+        "postings": b"".join(postings[gram].tobytes() for gram in grams),
+        "tokens": StringTable.pack(tables["tokens"]),
+        "token_ids": _pack_ints(tables["token_ids"]),
+        "name_token_offsets": name_token_offsets.tobytes(),
+        "name_token_positions": _pack_ints(
+            position for positions in name_positions for position in positions
+        ),
+    }
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    table, body = [], []
+    for name in SECTIONS:
+        # Sections are aligned, so integer arrays can be cast in place
+        padding = -offset % 8
+        body.append(b"\0" * padding)
+        offset += padding
+        table.append(SECTION.pack(offset, len(sections[name])))
+        body.append(sections[name])
+        offset += len(sections[name])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, version, len(SECTIONS)))
+        f.writelines(table)
+        f.writelines(body)
+    os.replace(tmp_path, path)
+
+
+def read_catalog_version(path: str) -> int | None:
+    try:
+        with open(path, "rb") as f:
+            magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return version if magic == MAGIC else None
+
+
+def read_catalog(path: str) -> tuple[int, CatalogItems, SearchIndex]:
+    """
+    Map catalog file into memory.
+
+    Pages of the file are shared by all processes that map it, nothing is
+    copied to the process memory except the strings that are being read.
+
+    Returns:
+        tuple: catalog version, items and search index
+    """
+    with open(path, "rb") as f:
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC or count != len(SECTIONS):
+        raise ValueError(f"Invalid catalog file [{path}]")
+    sections = {}
+    for i, name in enumerate(SECTIONS):
+        offset, size = SECTION.unpack_from(
+            data, HEADER.size + i * SECTION.size
+        )
+        section = data[offset : offset + size]
+        sections[name] = (
+            StringTable(section)
+            if name in STRING_SECTIONS
+            else section.cast("I")
+        )
+    names, lower_names = sections["names"], sections["lower_names"]
+    index = SearchIndex.from_tables(
+        names=names,
+        image_urls=sections["image_urls"],
+        lower_names=lower_names,
+        postings=Postings(
+            sections["grams"],
+            sections["posting_offsets"],
+            sections["postings"],
+        ),
+        name_tokens=TokenizedNames(
+            sections["tokens"],
+            sections["name_token_offsets"],
+            sections["name_token_positions"],
+        ),
+        rank=sections["rank"],
+        by_lower=sections["by_lower"],
+        sorted_lower=PermutedTable(lower_names, sections["by_lower"]),
+        tokens=sections["tokens"],
+        token_ids=sections["token_ids"],
+    )
+    return version, CatalogItems(names, sections["image_urls"]), index
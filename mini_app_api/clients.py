@@ -0,0 +1,78 @@
+import os
+from dataclasses import dataclass
+from typing import Self
+
+from bot.db import CLIENT_UPDATES_CHANNEL, Client, create_listener
+from mini_app_api.cache import TTLCache
+
+# Seconds a client is kept in the cache
+CLIENT_CACHE_TTL = int(os.getenv("CLIENT_CACHE_TTL", 60))
+# Number of clients kept in the cache
+CLIENT_CACHE_SIZE = int(os.getenv("CLIENT_CACHE_SIZE", 10000))
+
+
+@dataclass(frozen=True, slots=True)
+class ClientInfo:
+    """
+    Client fields that are used by the mini app API.
+
+    Attributes:
+        id (int): client id
+        chat_id (int): telegram chat_id
+        currency (str): client currency
+        lang (str): client language
+    """
+
+    id: int
+    chat_id: int
+    currency: str
+    lang: str
+
+    @classmethod
+    def from_client(cls, client: Client) -> Self:
+        return cls(client.id, client.chat_id, client.currency, client.lang)
+
+
+class ClientCache:
+    """
+    Clients by chat id, so most requests do not query the clients table.
+
+    The bot sends the chat id of a client to ``CLIENT_UPDATES_CHANNEL``
+    when the client changes language or currency and the client is
+    dropped from the cache. Entries also expire after ``ttl`` seconds in
+    case a notification was missed.
+    """
+
+    def __init__(
+        self, ttl: float = CLIENT_CACHE_TTL, max_size: int = CLIENT_CACHE_SIZE
+    ):
+        self.ttl = ttl
+        self._clients: TTLCache[int, ClientInfo] = TTLCache(max_size)
+        # Notifications may be missed while reconnecting
+        self._listener = create_listener(
+            CLIENT_UPDATES_CHANNEL,
+            self._on_notification,
+            on_reconnect=self._clients.clear,
+        )
+
+    def get(self, chat_id: int) -> ClientInfo | None:
+        return self._clients.get(chat_id)
+
+    def put(self, client: Client) -> ClientInfo:
+        info = ClientInfo.from_client(client)
+        return self._clients.put(info.chat_id, info, self.ttl)
+
+    def invalidate(self, chat_id: int) -> None:
+        self._clients.pop(chat_id)
+
+    def _on_notification(self, payload: str) -> None:
+        self.invalidate(int(payload))
+
+    async def start(self) -> None:
+        await self._listener.start()
+
+    async def stop(self) -> None:
+        await self._listener.stop()
+
+
+CLIENT_CACHE = ClientCache()
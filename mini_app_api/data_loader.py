@@ -1,57 +1,46 @@
 from datetime import date, datetime
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from bot.db import Client, Deal, Item, Price, SearchItem, get_async_session
+from bot.db import (
+    Item,
+    Position,
+    Price,
+    SearchItem,
+)
 from bot.db.data_helper import get_stats_data
+from mini_app_api.catalog import CATALOG
+from mini_app_api.clients import ClientInfo
 from mini_app_api.models import ItemDeal, PortfolioItem, StatsItem
 
-ALL_SEARCH_ITEMS = {}
-
 CURRENCY_MAP = {"USD": "$", "EUR": "€", "RUB": "₽", "UAH": "₴"}
 
 
-async def get_existing_search_items() -> dict[str, str]:
-    async with get_async_session() as session:
-        existing_items = await session.scalars(select(SearchItem))
-    return {item.name: item.image_url for item in existing_items}
-
-
 async def get_portfolio_data(
     client_id: int, currency: str, session: AsyncSession
 ) -> list[PortfolioItem]:
     query = (
         select(
-            func.min(Deal.date),
-            Item.name,
+            Position.first_buy_date,
+            Position.name,
             SearchItem.image_url,
-            Item.count,
-            func.sum(Deal.price * Deal.volume)
-            / func.sum(Deal.volume).label("avg_price"),
+            Position.count,
+            Position.buy_cost / Position.buy_volume,
             Price.price,
-            Deal.deal_currency,
+            Position.currency,
         )
-        .join(Item, Deal.item_id == Item.id)
-        .join(Price, Item.name == Price.name)
-        .join(SearchItem, Item.name == SearchItem.name)
-        .where(
-            Deal.client_id == client_id,
-            Deal.deal_type == "buy",
-            Deal.closed.is_(False),
-            Item.count > 0,
-            Deal.deal_currency == Price.currency,
-            Deal.deal_currency == currency,
-            Item.client_id == client_id,
+        .join(
+            Price,
+            (Position.name == Price.name)
+            & (Position.currency == Price.currency),
         )
-        .group_by(
-            Deal.item_id,
-            Item.name,
-            SearchItem.image_url,
-            Price.price,
-            Item.count,
-            Deal.deal_currency,
+        .join(SearchItem, Position.name == SearchItem.name)
+        .where(
+            Position.client_id == client_id,
+            Position.currency == currency,
+            Position.count > 0,
         )
     )
 
@@ -126,11 +115,16 @@ async def get_stats_data_for_client(
 
 
 async def get_item_with_deals_by_name(
-    client: Client, item_name: str
+    client: ClientInfo, item_name: str, session: AsyncSession
 ) -> PortfolioItem | None:
     query = (
-        select(Item, Price.price)
+        select(Item, Price.price, Position)
         .join(Price, Item.name == Price.name)
+        .outerjoin(
+            Position,
+            (Position.item_id == Item.id)
+            & (Position.currency == Price.currency),
+        )
         .where(
             Item.client_id == client.id,
             Item.name == item_name,
@@ -138,23 +132,20 @@ async def get_item_with_deals_by_name(
         )
         .options(selectinload(Item.deals))
     )
-    async with get_async_session() as session:
-        query_result = (await session.execute(query)).one_or_none()
-        if not query_result:
-            return None
-        item, current_price = query_result
-
-    buy_price = sum(
-        map(
-            lambda d: d.price * d.volume,
-            filter(lambda d: d.deal_type == "buy", item.deals),
+    query_result = (await session.execute(query)).one_or_none()
+    if not query_result:
+        return None
+    item, current_price, position = query_result
+
+    buy_deals = [d for d in item.deals if d.deal_type == "buy"]
+    if position is not None:
+        buy_price = position.buy_price
+        min_buy_deal_date = datetime.date(position.first_buy_date)
+    else:
+        buy_price = sum(d.price * d.volume for d in buy_deals) / sum(
+            d.volume for d in buy_deals
         )
-    ) / sum(
-        map(
-            lambda d: d.volume,
-            filter(lambda d: d.deal_type == "buy", item.deals),
-        )
-    )
+        min_buy_deal_date = min(datetime.date(d.date) for d in buy_deals)
 
     income_percentage = (
         current_price * 0.87
@@ -166,9 +157,6 @@ async def get_item_with_deals_by_name(
         date.today().isoformat(), "%Y-%m-%d"
     ).date()
 
-    min_buy_deal_date = min(
-        datetime.date(d.date) for d in item.deals if d.deal_type == "buy"
-    )
     max_sell_deal_date = max(
         (datetime.date(d.date) for d in item.deals if d.deal_type == "sell"),
         default=current_date,
@@ -183,7 +171,7 @@ async def get_item_with_deals_by_name(
     portfolio_item = PortfolioItem(
         name=item.name,
         currency=CURRENCY_MAP[client.currency],
-        image_url=ALL_SEARCH_ITEMS[item.name],
+        image_url=CATALOG.snapshot.items[item.name],
         deals=[
             ItemDeal(
                 deal_type=deal.deal_type.capitalize(),
@@ -1,43 +1,78 @@
-from typing import Annotated
+import os
+import time
+from typing import Annotated, AsyncGenerator
 
 from fastapi import Header, HTTPException, Depends
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.db import get_async_session, Client
+from mini_app_api.cache import TTLCache
+from mini_app_api.clients import CLIENT_CACHE, ClientInfo
 from mini_app_api.models import WebAppInitData
 
+# Number of verified init data kept in memory
+INIT_DATA_CACHE_SIZE = int(os.getenv("INIT_DATA_CACHE_SIZE", 10000))
+
+# Verified init data by the raw ``Authorization`` header. The mini app sends
+# the same header with every request of a session, so it is parsed and its
+# hash is checked once. A header that differs from a verified one in any
+# byte is verified again.
+INIT_DATA_CACHE: TTLCache[str, WebAppInitData] = TTLCache(INIT_DATA_CACHE_SIZE)
+
 
 async def get_web_app_init_data(
     authorization: Annotated[str, Header()],
 ) -> WebAppInitData:
+    if init_data := INIT_DATA_CACHE.get(authorization):
+        return init_data
     try:
         init_data = WebAppInitData(authorization)
     except Exception as exception:
         raise HTTPException(
             status_code=401, detail=str(exception)
         ) from exception
+    INIT_DATA_CACHE.put(
+        authorization, init_data, init_data.expires_at - time.time()
+    )
     return init_data
 
 
 InitDataDep = Annotated[WebAppInitData, Depends(get_web_app_init_data)]
 
 
-async def get_client(init_data: InitDataDep) -> Client:
+async def get_session() -> AsyncGenerator[AsyncSession]:
+    """Session shared by all dependencies and the route of a request."""
+    async with get_async_session() as session:
+        yield session
+
+
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+
+
+async def get_client(
+    init_data: InitDataDep, session: SessionDep
+) -> ClientInfo:
     if not init_data.user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    async with get_async_session() as session:
-        client = await session.scalar(
-            select(Client).where(Client.chat_id == init_data.user.id)
-        )
+    if client := CLIENT_CACHE.get(init_data.user.id):
+        return client
 
-        if not client:
-            client = Client(
-                name=init_data.user.first_name, chat_id=init_data.user.id
-            )
-            session.add(client)
+    client = await session.scalar(
+        select(Client).where(Client.chat_id == init_data.user.id)
+    )
+
+    if not client:
+        client = Client(
+            name=init_data.user.first_name, chat_id=init_data.user.id
+        )
+        session.add(client)
+        # Committed right away, so the client is kept even if the route
+        # fails and the request session is rolled back
+        await session.commit()
 
-    return client
+    return CLIENT_CACHE.put(client)
 
 
-ClientDep = Annotated[Client, Depends(get_client)]
+ClientDep = Annotated[ClientInfo, Depends(get_client)]
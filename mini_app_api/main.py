@@ -8,10 +8,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
 
-from mini_app_api.data_loader import (
-    get_existing_search_items,
-    ALL_SEARCH_ITEMS,
-)
+from mini_app_api.catalog import CATALOG
+from mini_app_api.clients import CLIENT_CACHE
 from mini_app_api.routes import profile, search, portfolio, stats
 
 load_dotenv()
@@ -27,10 +25,11 @@ sentry_sdk.init(
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    items = await get_existing_search_items()
-    ALL_SEARCH_ITEMS.update(items)
+    await CATALOG.start()
+    await CLIENT_CACHE.start()
     yield
-    pass
+    await CLIENT_CACHE.stop()
+    await CATALOG.stop()
 
 
 app = FastAPI(docs_url=None, openapi_url=None, lifespan=lifespan)
@@ -1,6 +1,8 @@
 import hashlib
 import hmac
 import json
+import os
+import time
 from typing import Literal, Annotated
 from urllib.parse import unquote
 
@@ -17,6 +19,14 @@ from typing_extensions import Self
 
 from bot import settings
 
+# Seconds after ``auth_date`` for which init data is accepted
+INIT_DATA_TTL = int(os.getenv("INIT_DATA_TTL", 86400))
+
+# https://core.telegram.org/bots/webapps#validating-data-received-via-the-mini-app
+WEB_APP_SECRET_KEY = hmac.new(
+    "WebAppData".encode(), (settings.BOT_TOKEN or "").encode(), hashlib.sha256
+).digest()
+
 
 def round_to_two_decimal(v: float) -> float:
     return round(v, 2)
@@ -75,6 +85,14 @@ class WebAppInitData(BaseModel):
         init_data_dict.update({"user": WebAppUser(init_data_dict.get("user"))})
         super().__init__(**init_data_dict)
 
+    @property
+    def expires_at(self) -> int:
+        return self.auth_date + INIT_DATA_TTL
+
+    @property
+    def is_expired(self) -> bool:
+        return time.time() >= self.expires_at
+
     @property
     def sorted_fields(self) -> list[str]:
         return sorted(filter(lambda x: x != "hash", self.model_fields.keys()))
@@ -91,18 +109,16 @@ class WebAppInitData(BaseModel):
             )
         )
 
-        secret_key = hmac.new(
-            "WebAppData".encode(), settings.BOT_TOKEN.encode(), hashlib.sha256
-        ).digest()
-
         expected_hash = hmac.new(
-            secret_key, data_check_string.encode(), hashlib.sha256
+            WEB_APP_SECRET_KEY, data_check_string.encode(), hashlib.sha256
         ).hexdigest()
 
         if not expected_hash == self.hash:
             raise ValueError(
                 f"actual hash: {self.hash} != expected_hash: {expected_hash}"
             )
+        if self.is_expired:
+            raise ValueError(f"init data expired at {self.expires_at}")
         return self
 
 
@@ -135,6 +151,12 @@ class PortfolioItem(BaseModel):
     deals: list[ItemDeal] | None = None
 
 
+class PricePoint(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+    date: str
+    price: Float2
+
+
 class PortfolioSummary(BaseModel):
     model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
     profit: Float2
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select, func
 
-from bot.db import get_async_session, Deal
+from bot.db import Deal
 from mini_app_api.data_loader import CURRENCY_MAP
 from mini_app_api.dependencies import (
     InitDataDep,
     ClientDep,
+    SessionDep,
     get_web_app_init_data,
     get_client,
 )
@@ -17,16 +18,17 @@ router = APIRouter(
 
 
 @router.get(path="/")
-async def profile(init_data: InitDataDep, client: ClientDep) -> dict:
+async def profile(
+    init_data: InitDataDep, client: ClientDep, session: SessionDep
+) -> dict:
     user = init_data.user
-    async with get_async_session() as session:
-        subquery = (
-            select(Deal.item_id)
-            .where(Deal.client_id == client.id, Deal.closed == False)
-            .group_by(Deal.item_id)
-        )
-        query = select(func.count()).select_from(subquery.subquery())
-        open_deals_items_count = await session.scalar(query)
+    subquery = (
+        select(Deal.item_id)
+        .where(Deal.client_id == client.id, Deal.closed == False)
+        .group_by(Deal.item_id)
+    )
+    query = select(func.count()).select_from(subquery.subquery())
+    open_deals_items_count = await session.scalar(query)
 
     user_dict = user.model_dump(by_alias=True)
     user_dict["openDealsItemsCount"] = open_deals_items_count
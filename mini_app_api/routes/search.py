@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from mini_app_api.data_loader import ALL_SEARCH_ITEMS
+from mini_app_api.catalog import CATALOG
 from mini_app_api.dependencies import (
     get_web_app_init_data,
     get_client,
@@ -14,11 +14,12 @@ router = APIRouter(
 
 MIN_QUERY_LENGTH = 3
 MAX_QUERY_LENGTH = 100
+MAX_RESULTS = 20
+MAX_AUTOCOMPLETE_RESULTS = 20
 
 
 @router.get(path="/")
 async def search(query: str) -> list[SearchItem]:
-    results = []
     query = query.strip().lower()
     if len(query) < MIN_QUERY_LENGTH or len(query) > MAX_QUERY_LENGTH:
         raise HTTPException(
@@ -28,26 +29,37 @@ async def search(query: str) -> list[SearchItem]:
                 f"and {MAX_QUERY_LENGTH} characters."
             ),
         )
-    words = query.split()
-    for name, image_url in ALL_SEARCH_ITEMS.items():
-        if all((word in name.lower()) for word in words):
-            results.append(SearchItem(name=name, image_url=image_url))
-    if len(results) >= 20:
+    index = CATALOG.snapshot.index
+    ids = index.search(query, limit=MAX_RESULTS)
+    if len(ids) >= MAX_RESULTS:
         raise HTTPException(
             status_code=400,
             detail="Too many items found. Refine your request.",
         )
-    results.sort(key=lambda item: item.name)
-    return results
+    return [
+        SearchItem(name=index.names[i], image_url=index.image_urls[i])
+        for i in ids
+    ]
+
+
+@router.get(path="/autocomplete/")
+async def autocomplete(
+    query: str = Query(min_length=1, max_length=MAX_QUERY_LENGTH),
+    limit: int = Query(default=10, ge=1, le=MAX_AUTOCOMPLETE_RESULTS),
+) -> list[SearchItem]:
+    index = CATALOG.snapshot.index
+    return [
+        SearchItem(name=index.names[i], image_url=index.image_urls[i])
+        for i in index.autocomplete(query, limit=limit)
+    ]
 
 
 @router.get(path="/{item_name}/")
 async def get_by_name(item_name: str) -> SearchItem:
-    if item_name not in ALL_SEARCH_ITEMS:
+    items = CATALOG.snapshot.items
+    if item_name not in items:
         raise HTTPException(
             status_code=404, detail=f"Item [{item_name}] not found"
         )
     else:
-        return SearchItem(
-            name=item_name, image_url=ALL_SEARCH_ITEMS[item_name]
-        )
+        return SearchItem(name=item_name, image_url=items[item_name])
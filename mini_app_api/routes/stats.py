@@ -1,11 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 
-from bot.db import get_async_session
 from mini_app_api.data_loader import (
     CURRENCY_MAP,
     get_stats_data_for_client,
 )
-from mini_app_api.dependencies import ClientDep, get_client
+from mini_app_api.dependencies import ClientDep, SessionDep, get_client
 from mini_app_api.models import StatsSummary
 
 router = APIRouter(
@@ -15,11 +14,10 @@ router = APIRouter(
 
 
 @router.get(path="/")
-async def get_stats(client: ClientDep) -> StatsSummary:
-    async with get_async_session() as session:
-        items = await get_stats_data_for_client(
-            client_id=client.id, currency=client.currency, session=session
-        )
+async def get_stats(client: ClientDep, session: SessionDep) -> StatsSummary:
+    items = await get_stats_data_for_client(
+        client_id=client.id, currency=client.currency, session=session
+    )
 
     if not items:
         raise HTTPException(status_code=404, detail="Stats info is not found")
@@ -0,0 +1,251 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from typing import Any, Iterator, Self
+
+GRAM_SIZE = 3
+# Share of query trigrams a name should contain to be a fuzzy match
+FUZZY_THRESHOLD = 0.4
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    """
+    Trigram inverted index of search item names.
+
+    Names are sorted once, so item ids follow name order and results come
+    out sorted. Every trigram of a lowercase name points to the ids of the
+    names that contain it, a query only verifies names from the shortest
+    posting list of its trigrams instead of scanning all of them.
+
+    Args:
+        items (dict[str, str]): item name to image url
+        popularity (dict[str, int]): item name to number of holders
+    """
+
+    def __init__(
+        self,
+        items: dict[str, str] | None = None,
+        popularity: dict[str, int] | None = None,
+    ):
+        self.popularity: dict[str, int] = {}
+        self.update(items or {}, popularity)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_tables(
+        cls,
+        names: Sequence[str],
+        image_urls: Sequence[str],
+        lower_names: Sequence[str],
+        postings,
+        name_tokens: Sequence[list[str]],
+        rank: Sequence[int],
+        by_lower: Sequence[int],
+        sorted_lower: Sequence[str],
+        tokens: Sequence[str],
+        token_ids: Sequence[int],
+    ) -> Self:
+        """
+        Index over tables that were built by ``update`` before.
+
+        Used to search a catalog file mapped into memory, tables are any
+        read-only sequences and ``postings`` is anything with ``get`` that
+        returns ids of names that contain a trigram.
+        """
+        index = cls.__new__(cls)
+        index.popularity = {}
+        index.names, index.image_urls = names, image_urls
+        index._lower_names, index._postings = lower_names, postings
+        index._name_tokens, index._rank = name_tokens, rank
+        index._by_lower, index._sorted_lower = by_lower, sorted_lower
+        index._tokens, index._token_ids = tokens, token_ids
+        return index
+
+    def tables(self) -> dict[str, Any]:
+        """
+        Tables of the index by the argument names of ``from_tables``.
+
+        Postings of an index built by ``update`` are a dict of trigram to
+        an array of name ids.
+        """
+        return {
+            "names": self.names,
+            "image_urls": self.image_urls,
+            "lower_names": self._lower_names,
+            "postings": self._postings,
+            "name_tokens": self._name_tokens,
+            "rank": self._rank,
+            "by_lower": self._by_lower,
+            "sorted_lower": self._sorted_lower,
+            "tokens": self._tokens,
+            "token_ids": self._token_ids,
+        }
+
+    def update(
+        self, items: dict[str, str], popularity: dict[str, int] | None = None
+    ) -> None:
+        """
+        Rebuild the index.
+
+        Args:
+            items (dict[str, str]): item name to image url
+            popularity (dict[str, int]): item name to number of holders,
+                the previous numbers are kept if not passed
+        """
+        names = sorted(items)
+        lower_names = [name.lower() for name in names]
+        postings: dict[str, array] = defaultdict(lambda: array("I"))
+        name_tokens = [TOKEN_PATTERN.findall(name) for name in lower_names]
+        tokens = []
+        for i, name in enumerate(lower_names):
+            for gram in trigrams(name):
+                postings[gram].append(i)
+            tokens.extend((token, i) for token in name_tokens[i])
+        tokens.sort()
+        by_lower = sorted(range(len(names)), key=lower_names.__getitem__)
+        if popularity is None:
+            popularity = self.popularity
+        # Position of the item when items are sorted by popularity
+        rank = array("I", bytes(4 * len(names)))
+        by_popularity = sorted(
+            range(len(names)), key=lambda i: -popularity.get(names[i], 0)
+        )
+        for position, i in enumerate(by_popularity):
+            rank[i] = position
+        # Attributes are replaced at once, so readers never see a mix
+        self.names, self.image_urls = names, [items[name] for name in names]
+        self.popularity = popularity
+        self._lower_names, self._postings = lower_names, dict(postings)
+        self._name_tokens, self._rank = name_tokens, rank
+        self._by_lower = array("I", by_lower)
+        self._sorted_lower = [lower_names[i] for i in by_lower]
+        self._tokens = [token for token, _ in tokens]
+        self._token_ids = array("I", (i for _, i in tokens))
+
+    def _candidates(self, words: list[str]) -> Iterator[int] | array:
+        grams = set().union(*(trigrams(word) for word in words))
+        if not grams:
+            # Words are shorter than a trigram
+            return iter(range(len(self.names)))
+        shortest = None
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return array("I")
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        return shortest
+
+    def search(self, query: str, limit: int) -> list[int]:
+        """
+        Find ids of items whose names contain every word of the query.
+
+        Args:
+            query (str): search query
+            limit (int): number of results after which the search stops
+
+        Returns:
+            list[int]: up to ``limit`` item ids in name order
+        """
+        words = query.lower().split()
+        results = []
+        for i in self._candidates(words):
+            name = self._lower_names[i]
+            if all(word in name for word in words):
+                results.append(i)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def _prefixed(self, prefix: str) -> Iterator[int]:
+        """Ids of names that start with the prefix."""
+        start = bisect_left(self._sorted_lower, prefix)
+        for i in range(start, len(self._sorted_lower)):
+            if not self._sorted_lower[i].startswith(prefix):
+                return
+            yield self._by_lower[i]
+
+    def _token_range(self, prefix: str) -> range:
+        """Positions of tokens that start with the prefix."""
+        return range(
+            bisect_left(self._tokens, prefix),
+            bisect_left(self._tokens, prefix + "\U0010ffff"),
+        )
+
+    def _fuzzy(self, query: str) -> dict[int, float]:
+        """Ids of names that share most of the query trigrams."""
+        grams = trigrams(query.replace(" ", ""))
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._postings.get(gram, ()))
+        return {
+            i: count / len(grams)
+            for i, count in counts.items()
+            if count >= FUZZY_THRESHOLD * len(grams)
+        }
+
+    def autocomplete(self, query: str, limit: int) -> list[int]:
+        """
+        Find best item ids for a partially typed query.
+
+        Names are ranked by the kind of match: names that start with the
+        query, names with tokens starting with every query word, names
+        that contain every query word and names that share most of the
+        query trigrams, which covers typos. Matches of the same kind are
+        ranked by the number of clients that hold the item. Weaker kinds
+        are searched only if the stronger ones did not fill the limit.
+
+        Args:
+            query (str): search query
+            limit (int): number of results
+
+        Returns:
+            list[int]: up to ``limit`` item ids, best first
+        """
+        query = " ".join(query.lower().split())
+        words = query.split()
+        if not words:
+            return []
+        results: dict[int, None] = {}
+
+        def add(ids, key=self._rank.__getitem__):
+            ids = dict.fromkeys(i for i in ids if i not in results)
+            best = heapq.nsmallest(limit - len(results), ids, key=key)
+            results.update(dict.fromkeys(best))
+            return len(results) >= limit
+
+        if add(self._prefixed(query)):
+            return list(results)
+        tokens = min(map(self._token_range, words), key=len)
+        if add(
+            self._token_ids[t]
+            for t in tokens
+            if all(
+                any(
+                    token.startswith(word)
+                    for token in self._name_tokens[self._token_ids[t]]
+                )
+                for word in words
+            )
+        ):
+            return list(results)
+        if add(
+            i
+            for i in self._candidates(words)
+            if all(word in self._lower_names[i] for word in words)
+        ):
+            return list(results)
+        similarity = self._fuzzy(query)
+        add(similarity, key=lambda i: (-similarity[i], self._rank[i]))
+        return list(results)
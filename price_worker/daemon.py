@@ -0,0 +1,267 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from functools import partial
+
+from price_worker.fx import FX_FANOUT, FxFanout
+from price_worker.market import REQUESTS_PER_ITEM, get_item_price
+from price_worker.models import MarketItem
+from price_worker.proxies import (
+    ProxyClientPool,
+    ProxyListCache,
+    ProxyRegistry,
+)
+from price_worker.scheduler import RequestScheduler
+from price_worker.storage import PriceIndex, PriceKey, get_open_items_demand
+
+# Refresh interval of items with many open deals in seconds
+DAEMON_MIN_INTERVAL = int(os.getenv("DAEMON_MIN_INTERVAL", 900))
+# Refresh interval of items with a single open deal in seconds
+DAEMON_MAX_INTERVAL = int(os.getenv("DAEMON_MAX_INTERVAL", 7200))
+# Requests per minute the daemon is allowed to send to Steam
+DAEMON_REQUEST_BUDGET = int(os.getenv("DAEMON_REQUEST_BUDGET", 600))
+# Items refreshed by a single scheduler run
+DAEMON_BATCH_SIZE = int(os.getenv("DAEMON_BATCH_SIZE", 100))
+# Seconds between reloads of open items from the database
+DAEMON_RELOAD_INTERVAL = 600
+# Seconds before an item that got no price is requested again
+DAEMON_RETRY_INTERVAL = 120
+# Longest sleep when nothing is due, so reloads are not delayed
+DAEMON_IDLE_SLEEP = 30
+DAEMON_TIMEOUT = 10
+
+logger = logging.getLogger("price-worker")
+
+# Place of an item in the refresh queue, item name or name and currency
+Slot = str | tuple[str, int]
+
+
+def refresh_interval(deals: int) -> float:
+    """Items referenced by more open deals are refreshed more often."""
+    return max(
+        DAEMON_MIN_INTERVAL, DAEMON_MAX_INTERVAL / (1 + math.log2(deals))
+    )
+
+
+class RefreshQueue:
+    """
+    Priority queue of ``(name, currency)`` ordered by the time when the
+    price should be refreshed.
+
+    With ``by_name`` all currencies of an item share one place in the queue.
+    The item is due at the earliest due time of its currencies and all of
+    them are popped together, so FX fanout can derive them from a single
+    request.
+
+    Heap entries are not removed when an item is rescheduled or dropped,
+    outdated entries are skipped on pop instead.
+
+    Args:
+        by_name (bool): schedule all currencies of an item together
+    """
+
+    def __init__(self, by_name: bool = False):
+        self.by_name = by_name
+        self._heap: list[tuple[float, Slot]] = []
+        self._due: dict[Slot, float] = {}
+        self._demand: dict[PriceKey, int] = {}
+        self._keys: dict[Slot, list[PriceKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._demand)
+
+    def _slot(self, key: PriceKey) -> Slot:
+        name, currency = key
+        return name if self.by_name else (name, currency.value)
+
+    def _schedule(self, slot: Slot, due: float) -> None:
+        self._due[slot] = due
+        heapq.heappush(self._heap, (due, slot))
+
+    def reload(self, demand: dict[PriceKey, int], index: PriceIndex) -> None:
+        """
+        Replace queued items with the open ones.
+
+        Args:
+            demand (dict): number of open deals per item
+            index (PriceIndex): current prices used to find stale items
+        """
+        keys: dict[Slot, list[PriceKey]] = defaultdict(list)
+        for key in demand:
+            keys[self._slot(key)].append(key)
+        for slot in self._due.keys() - keys.keys():
+            del self._due[slot]
+        for slot, slot_keys in keys.items():
+            if (
+                slot in self._due
+                and slot_keys == self._keys.get(slot)
+                and all(self._demand[key] == demand[key] for key in slot_keys)
+            ):
+                continue
+            due = []
+            for key in slot_keys:
+                record = index.get(key)
+                updated = record.updated.timestamp() if record else 0.0
+                due.append(updated + refresh_interval(demand[key]))
+            self._schedule(slot, min(due))
+        self._demand, self._keys = demand, dict(keys)
+        # Drop outdated entries once they take most of the heap
+        if len(self._heap) > 2 * len(self._due):
+            self._heap = [(due, slot) for slot, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def pop_due(self, now: float, limit: int) -> list[MarketItem]:
+        items = []
+        while self._heap and len(items) < limit:
+            due, slot = self._heap[0]
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            if self._due.get(slot) != due:
+                continue
+            del self._due[slot]
+            items.extend(
+                MarketItem(name=name, currency=currency)
+                for name, currency in self._keys[slot]
+            )
+        return items
+
+    def next_due(self) -> float | None:
+        while self._heap:
+            due, slot = self._heap[0]
+            if self._due.get(slot) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def done(self, item: MarketItem, refreshed: bool, now: float) -> None:
+        """
+        Put a popped item back with the next refresh time.
+
+        Items that share a place in the queue are due at the earliest of
+        their next refresh times.
+        """
+        key = item.key
+        if key not in self._demand:
+            return
+        interval = (
+            refresh_interval(self._demand[key])
+            if refreshed
+            else DAEMON_RETRY_INTERVAL
+        )
+        slot = self._slot(key)
+        due = now + interval
+        if slot in self._due:
+            due = min(due, self._due[slot])
+        self._schedule(slot, due)
+
+
+async def refresh_batch(
+    batch: list[MarketItem],
+    index: PriceIndex,
+    fanout: FxFanout,
+    pool: ProxyClientPool,
+    registry: ProxyRegistry,
+) -> tuple[set[PriceKey], int]:
+    """
+    Request prices of the batch and save them.
+
+    Returns:
+        tuple: refreshed keys and number of requests sent
+    """
+    scheduler = RequestScheduler(
+        fetch=partial(
+            get_item_price,
+            timeout=DAEMON_TIMEOUT,
+            pool=pool,
+            registry=registry,
+        ),
+        registry=registry,
+        attempts=REQUESTS_PER_ITEM,
+    )
+    results = await scheduler.run(fanout.plan(batch))
+    prices = fanout.expand(item for item in results if item.has_price)
+    await index.save_prices(prices.items())
+    refreshed = set(prices)
+    for item in results:
+        if item.success_no_price:
+            refreshed.update(
+                (item.name, currency)
+                for currency in fanout.targets.get(item.name, {item.currency})
+            )
+    return refreshed, scheduler.requests_sent
+
+
+async def run_daemon():
+    """
+    Refresh prices of all open items continuously.
+
+    Every item is due ``refresh_interval`` seconds after its last update,
+    items with more open deals are due sooner. Due items are refreshed in
+    batches and the daemon sleeps between batches to stay within
+    ``DAEMON_REQUEST_BUDGET`` requests per minute.
+    """
+    logger.info("Price daemon start")
+    index = PriceIndex()
+    fanout = FxFanout()
+    queue = RefreshQueue(by_name=FX_FANOUT)
+    registry = ProxyRegistry()
+    registry.load()
+    reloaded = 0.0
+    async with ProxyClientPool() as pool, ProxyListCache() as proxy_list:
+        while True:
+            try:
+                if time.monotonic() - reloaded >= DAEMON_RELOAD_INTERVAL:
+                    demand = await get_open_items_demand()
+                    await index.refresh(
+                        {name for name, _ in demand.keys() - index.prices}
+                    )
+                    queue.reload(demand, index)
+                    if FX_FANOUT:
+                        fanout = await FxFanout.load()
+                    reloaded = time.monotonic()
+                    logger.info(f"Tracking prices of {len(queue)} items")
+
+                now = time.time()
+                batch = queue.pop_due(now, DAEMON_BATCH_SIZE)
+                if not batch:
+                    next_due = queue.next_due() or now + DAEMON_IDLE_SLEEP
+                    await asyncio.sleep(
+                        min(DAEMON_IDLE_SLEEP, max(1.0, next_due - now))
+                    )
+                    continue
+
+                start = time.monotonic()
+                try:
+                    registry.update(await proxy_list.get())
+                    refreshed, requests = await refresh_batch(
+                        batch, index, fanout, pool, registry
+                    )
+                except Exception:
+                    for item in batch:
+                        queue.done(item, refreshed=False, now=time.time())
+                    raise
+                now = time.time()
+                for item in batch:
+                    queue.done(
+                        item,
+                        refreshed=(item.name, item.currency) in refreshed,
+                        now=now,
+                    )
+                elapsed = time.monotonic() - start
+                logger.info(
+                    f"Refreshed {len(refreshed)} prices of {len(batch)} "
+                    f"items with {requests} requests in {elapsed:.2f}s"
+                )
+                registry.save()
+                await pool.evict()
+                await asyncio.sleep(
+                    max(0.0, requests * 60 / DAEMON_REQUEST_BUDGET - elapsed)
+                )
+            except Exception:
+                logger.exception("Price daemon iteration failed")
+                await asyncio.sleep(DAEMON_RETRY_INTERVAL)
@@ -0,0 +1,101 @@
+import os
+from collections import defaultdict
+from typing import Iterable, Self
+
+from sqlalchemy import select
+
+from bot.db import PriceLimit, get_async_session
+from price_worker.models import Currency, MarketItem
+from price_worker.storage import PriceKey
+
+# Fetch items held in several currencies once and convert the price
+FX_FANOUT = os.getenv("FX_FANOUT", "false").lower() in ("1", "true", "yes")
+FX_BASE_CURRENCY = Currency[os.getenv("FX_BASE_CURRENCY", "USD")]
+
+
+class FxFanout:
+    """
+    Derives prices in several currencies from a single market request.
+
+    Items held in one currency are requested as is. For items held in
+    several currencies only the base currency is requested and the rest of
+    the prices are converted with the rates stored in ``price_limits`` by
+    the bot. Without rates every item is requested as is.
+
+    Args:
+        rates (dict[Currency, float]): exchange rates to USD
+        base (Currency): currency that is requested from Steam
+    """
+
+    def __init__(
+        self,
+        rates: dict[Currency, float] | None = None,
+        base: Currency = FX_BASE_CURRENCY,
+    ):
+        self.rates = rates or {}
+        self.base = base
+        self.targets: dict[str, set[Currency]] = {}
+
+    @classmethod
+    async def load(cls) -> Self:
+        async with get_async_session() as session:
+            limits = (await session.scalars(select(PriceLimit))).all()
+        return cls(
+            {
+                Currency[limit.currency]: limit.rate
+                for limit in limits
+                if limit.currency in Currency.__members__ and limit.rate
+            }
+        )
+
+    def plan(self, items: Iterable[MarketItem]) -> list[MarketItem]:
+        """
+        Return items to request and remember the prices to derive.
+
+        Only the prices of the last planned items are derived by
+        ``expand``. ``targets`` are the held currencies of items that are
+        requested in the base currency.
+        """
+        self.targets = {}
+        currencies: dict[str, set[Currency]] = defaultdict(set)
+        for item in items:
+            currencies[item.name].add(item.currency)
+        requests = []
+        for name, held in currencies.items():
+            if (
+                len(held) > 1
+                and self.base in self.rates
+                and all(currency in self.rates for currency in held)
+            ):
+                self.targets[name] = held
+                requests.append(MarketItem(name=name, currency=self.base))
+            else:
+                requests.extend(
+                    MarketItem(name=name, currency=currency)
+                    for currency in held
+                )
+        return requests
+
+    def expand(self, items: Iterable[MarketItem]) -> dict[PriceKey, float]:
+        """
+        Prices of priced items in the held currencies.
+
+        The base price of a fanned out item is only used for conversion
+        and is not returned unless the base currency is held too.
+        """
+        prices = {}
+        for item in items:
+            price = item.price_float
+            if item.currency != self.base or item.name not in self.targets:
+                prices[item.key] = price
+                continue
+            for currency in self.targets[item.name]:
+                prices[(item.name, currency)] = (
+                    price
+                    if currency == self.base
+                    else round(
+                        price * self.rates[currency] / self.rates[self.base],
+                        2,
+                    )
+                )
+        return prices
@@ -1,29 +1,41 @@
+import argparse
 import asyncio
 import logging
 import os
-import random
-import re
 import time
-from dataclasses import dataclass
-from datetime import datetime
-from enum import Enum
-from itertools import chain, cycle, islice
-from typing import Iterator, Self
+from functools import partial
+from typing import Iterable
 
-import httpx
 from dotenv import load_dotenv
-from sqlalchemy import select
 
-from bot.db import Deal, Item, Price, get_async_session
+from bot.db import Item, get_async_session
+from price_worker.daemon import run_daemon
+from price_worker.fx import FX_FANOUT, FxFanout
+from price_worker.market import REQUESTS_PER_ITEM, get_item_price
+from price_worker.models import Currency, MarketItem
+from price_worker.proxies import (
+    ProxyClientPool,
+    ProxyListCache,
+    ProxyRegistry,
+)
+from price_worker.scheduler import RequestScheduler
+from price_worker.storage import (
+    PriceIndex,
+    PriceKey,
+    get_open_items,
+    name_hash,
+    open_items_query,
+)
 
 load_dotenv()
 
-MARKET_URL = "https://steamcommunity.com/market/priceoverview/"
-PROXIES_URL = os.getenv("PROXIES_URL")
-SEGMENT = int(os.getenv("SEGMENT"))
-ITEMS_IN_SEGMENT = int(os.getenv("ITEMS_IN_SEGMENT"))
+SEGMENT = int(os.getenv("SEGMENT", 0))
+ITEMS_IN_SEGMENT = int(os.getenv("ITEMS_IN_SEGMENT", 100))
 OFFSET = ITEMS_IN_SEGMENT * SEGMENT
-REQUESTS_PER_ITEM = 10
+# "hash" - by hash of the name, "offset" - consecutive pages by name
+SEGMENT_MODE = os.getenv("SEGMENT_MODE", "hash")
+# Number of segments in "hash" mode
+SEGMENTS = int(os.getenv("SEGMENTS", 13))
 
 
 logger = logging.getLogger("price-worker")
@@ -31,13 +43,6 @@ logger.setLevel(logging.INFO)
 logger.addHandler(logging.StreamHandler())
 
 
-class Currency(Enum):
-    USD = 1
-    EUR = 3
-    RUB = 5
-    UAH = 18
-
-
 def timeit(func):
     async def inner(*args, **kwargs):
         start = time.monotonic()
@@ -49,113 +54,58 @@ def timeit(func):
     return inner
 
 
-@dataclass
-class PriceResponse:
-    lowest_price: str | None = None
-    median_price: str | None = None
-    success: bool | None = None
-    volume: str | None = None
-
-    @classmethod
-    def from_dict(cls, **kwargs) -> Self:
-        return cls(**kwargs)
-
-
-@dataclass
-class MarketItem:
-    name: str
-    currency: Currency
-    price: PriceResponse | None = None
-
-    @property
-    def has_price(self) -> bool:
-        return (
-            self.price.success
-            if self.price
-            and self.price.success
-            and (self.price.median_price or self.price.lowest_price)
-            else False
-        )
+class ItemPriceManager:
+    """
+    Progress of the price update.
 
-    @property
-    def success_no_price(self) -> bool:
-        return (
-            self.price.success
-            if self.price
-            and self.price.success
-            and (not self.price.median_price and not self.price.lowest_price)
-            else False
-        )
+    Items are split into pending ones, ones without a price on the market
+    and priced ones when they are added or updated, so progress checks do
+    not scan all items.
+    """
 
-    @property
-    def price_string(self) -> str | None:
-        if not self.has_price:
-            return
-        if self.price.lowest_price:
-            return self.price.lowest_price
-        else:
-            return self.price.median_price
+    def __init__(self, items: Iterable[MarketItem]):
+        self.items: dict[PriceKey, MarketItem] = {}
+        self._pending: dict[PriceKey, MarketItem] = {}
+        self._without_price: dict[PriceKey, MarketItem] = {}
+        for item in items:
+            self.update_item(item)
 
     @property
-    def price_float(self) -> float | None:
-        if not self.has_price:
-            return
-        price = self.price_string
-        if self.currency == Currency.USD:
-            price = price.replace(",", "")
-        price = price.replace(",", ".").replace(" ", "")
-        price = re.sub(
-            r"([$₴€\-\s]|руб\.)", "", price
-        )  # p - English letter in russian currency (WTF Valve #3) -> Finally fixed
-        return float(price)
-
-    def __str__(self):
-        if self.has_price:
-            return f"[{self.name}] --> [{self.price_string}]"
-        else:
-            return f"[{self.name}] --> NO PRICE"
-
-
-class ItemPriceManager:
-    def __init__(self, items: Iterator[MarketItem]):
-        self.items: dict[str, MarketItem] = {
-            self._create_key(item): item for item in items
-        }
-
-    @staticmethod
-    def _create_key(item: MarketItem) -> str:
-        return f"{item.name}-{item.currency.name}"
+    def finished(self) -> bool:
+        return not self._pending
 
     @property
-    def finished(self) -> bool:
-        return all(
-            (item.has_price or item.success_no_price)
-            for item in self.items.values()
-        )
+    def items_without_price(self) -> Iterable[MarketItem]:
+        """Items that should be requested again."""
+        return self._pending.values()
 
     @property
-    def items_without_price(self) -> Iterator[MarketItem]:
-        return (
-            item
-            for item in self.items.values()
-            if not item.has_price or item.success_no_price
-        )
+    def items_without_market_price(self) -> Iterable[MarketItem]:
+        """Items that Steam returned without any price."""
+        return self._without_price.values()
 
     @property
     def success_count(self) -> int:
-        return sum(item.has_price for item in self.items.values())
+        return len(self.items) - len(self._pending) - len(self._without_price)
 
     @property
     def remaining_count(self) -> int:
-        return len(self.items.values()) - self.success_count
+        return len(self.items) - self.success_count
 
     def show_progress(self):
         logger.info(
-            f"Progress is {100 * self.success_count / len(self.items.values()):.2f}%"
+            f"Progress is {100 * self.success_count / len(self.items):.2f}%"
         )
 
     def update_item(self, item: MarketItem):
-        self.items.update({self._create_key(item): item})
+        key = item.key
+        self.items[key] = item
+        self._pending.pop(key, None)
+        self._without_price.pop(key, None)
+        if item.success_no_price:
+            self._without_price[key] = item
+        elif not item.has_price:
+            self._pending[key] = item
 
 
 def read_items_from_file(file: str) -> set[str]:
@@ -163,79 +113,65 @@ def read_items_from_file(file: str) -> set[str]:
         return set(f.read().splitlines())
 
 
-async def get_items_from_db() -> Iterator[MarketItem]:
-    query = (
-        select(
-            Item.name.label("item_name"),
-            Deal.deal_currency.label("currency"),
-        )
-        .where(Item.id == Deal.item_id, Item.count > 0, Deal.closed.is_(False))
-        .group_by(Item.name, Deal.deal_currency)
-        .order_by(Item.name)
-    )
+async def get_items_from_db() -> list[MarketItem]:
+    """
+    Read items of the worker segment.
+
+    In ``hash`` mode an item belongs to the segment
+    ``hash(name) % SEGMENTS``, so new items do not move the rest of them
+    to other segments and the segment is selected by a single query. In
+    ``offset`` mode segments are consecutive pages of ``ITEMS_IN_SEGMENT``
+    items ordered by name, every segment aggregates the items of the
+    previous ones and items beyond the last segment are never updated.
+    """
+    if SEGMENT_MODE == "hash":
+        return await get_open_items(name_hash(Item.name) % SEGMENTS == SEGMENT)
+    query = open_items_query().offset(OFFSET).limit(ITEMS_IN_SEGMENT)
     async with get_async_session() as session:
-        items = map(
-            lambda i: MarketItem(name=i[0], currency=Currency[f"{i[1]}"]),
-            (await session.execute(query)).all(),
-        )
+        return [
+            MarketItem(name=name, currency=Currency[currency])
+            for name, currency in await session.execute(query)
+        ]
 
-    return islice(items, OFFSET, OFFSET + ITEMS_IN_SEGMENT)
-
-
-def map_item_to_proxy(items: Iterator[MarketItem], proxies: list[str]):
-    random.shuffle(proxies)
-    return zip(items, cycle(proxies))
-
-
-async def get_http_proxies() -> list[str]:
-    async with httpx.AsyncClient() as client:
-        response = await client.get(PROXIES_URL)
-
-    return list(
-        map(
-            lambda x: ":".join(x.removeprefix("http://").split(":")[0:2]),
-            response.text.splitlines(),
-        )
-    )
 
-
-async def get_item_price(
-    item: MarketItem, proxy: str, timeout: int
-) -> MarketItem | None:
-    async with httpx.AsyncClient(
-        proxy=f"http://{proxy}",
-        timeout=timeout,
-        verify=False,
-        limits=httpx.Limits(
-            max_connections=1, max_keepalive_connections=1, keepalive_expiry=1
-        ),
-    ) as client:
+@timeit
+async def main():
+    fanout = await FxFanout.load() if FX_FANOUT else FxFanout()
+    manager = ItemPriceManager(fanout.plan(await get_items_from_db()))
+    index = await PriceIndex.load(item.name for item in manager.items.values())
+    registry = ProxyRegistry()
+    registry.load()
+    async with ProxyClientPool() as pool, ProxyListCache() as proxy_list:
         try:
-            response = await client.get(
-                url=MARKET_URL,
-                params={
-                    "appid": 730,
-                    "currency": item.currency.value,
-                    "market_hash_name": item.name,
-                },
+            await update_prices(
+                manager, index, fanout, pool, registry, proxy_list
             )
-        except Exception:  # Ignore any exceptions here
-            return
-    if response.status_code == 200:
-        try:
-            json_response = response.json()
-        except Exception:
-            return
-        item.price = PriceResponse.from_dict(**json_response)
-    return item
+        finally:
+            registry.save()
+    logger.info(
+        "----------------------------SUMMARY----------------------------"
+    )
+    logger.info(f"Has price -> {manager.success_count} items")
+    logger.info(f"Doesn't have price -> {manager.remaining_count} items")
+    for item in manager.items_without_market_price:
+        logger.info(item)
+    logger.info(
+        "----------------------------SUMMARY----------------------------"
+    )
 
 
-@timeit
-async def main():
-    manager = ItemPriceManager(await get_items_from_db())
+async def update_prices(
+    manager: ItemPriceManager,
+    index: PriceIndex,
+    fanout: FxFanout,
+    pool: ProxyClientPool,
+    registry: ProxyRegistry,
+    proxy_list: ProxyListCache,
+):
     while not manager.finished:
         start = time.monotonic()
-        proxies = await get_http_proxies()
+        await pool.evict()
+        registry.update(await proxy_list.get())
 
         match manager.remaining_count:
             case count if 1 <= count <= 10:
@@ -245,64 +181,35 @@ async def main():
             case _:
                 timeout = 15
 
-        tasks = (
-            get_item_price(*item_proxy, timeout=timeout)
-            for item_proxy in map_item_to_proxy(
-                chain(
-                    *(
-                        manager.items_without_price
-                        for _ in range(REQUESTS_PER_ITEM)
-                    )
-                ),
-                proxies,
-            )
-        )
-
-        results: list[MarketItem] = list(
-            filter(
-                lambda i: i is not None and i.has_price,
-                (await asyncio.gather(*tasks)),
-            )
+        scheduler = RequestScheduler(
+            fetch=partial(
+                get_item_price, timeout=timeout, pool=pool, registry=registry
+            ),
+            registry=registry,
+            attempts=REQUESTS_PER_ITEM,
         )
-        async with get_async_session() as session:
-            for item in results:
-                db_price = await session.scalar(
-                    select(Price).where(
-                        Price.name == item.name,
-                        Price.currency == item.currency.name,
-                    )
-                )
-                if db_price:
-                    db_price.price = item.price_float
-                    db_price.updated = datetime.now()
-                else:
-                    session.add(
-                        Price(
-                            name=item.name,
-                            currency=item.currency.value,
-                            updated=datetime.now(),
-                            price=item.price_float,
-                        )
-                    )
-                await session.commit()
-                logger.info(item)
+        results = await scheduler.run(list(manager.items_without_price))
+        for item in results:
+            manager.update_item(item)
+        results = [item for item in results if item.has_price]
+        await index.save_prices(fanout.expand(results).items())
+        for item in results:
+            logger.info(item)
         stop = time.monotonic()
         logger.info(f"Iteration completed in {stop - start:.2f}s")
         manager.show_progress()
-    logger.info(
-        "----------------------------SUMMARY----------------------------"
-    )
-    logger.info(f"Has price -> {manager.success_count} items")
-    logger.info(f"Doesn't have price -> {manager.remaining_count} items")
-    for item in filter(lambda i: i.success_no_price, manager.items.values()):
-        logger.info(item)
-    logger.info(
-        "----------------------------SUMMARY----------------------------"
-    )
+        registry.save()
 
 
 def run():
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(prog="price-worker")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="refresh prices of all items continuously instead of one segment",
+    )
+    args = parser.parse_args()
+    asyncio.run(run_daemon() if args.daemon else main())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+import time
+
+from price_worker.models import MarketItem, PriceResponse
+from price_worker.proxies import ProxyClientPool, ProxyRegistry
+
+MARKET_URL = "https://steamcommunity.com/market/priceoverview/"
+REQUESTS_PER_ITEM = 10
+
+
+async def get_item_price(
+    item: MarketItem,
+    proxy: str,
+    timeout: int,
+    pool: ProxyClientPool,
+    registry: ProxyRegistry,
+) -> MarketItem | None:
+    start = time.monotonic()
+    async with pool.client(proxy) as client:
+        try:
+            response = await client.get(
+                url=MARKET_URL,
+                params={
+                    "appid": 730,
+                    "currency": item.currency.value,
+                    "market_hash_name": item.name,
+                },
+                timeout=timeout,
+            )
+        except Exception:  # Ignore any exceptions here
+            registry.record_failure(proxy)
+            return
+    if response.status_code != 200:
+        registry.record_failure(
+            proxy, rate_limited=response.status_code == 429
+        )
+        return
+    try:
+        json_response = response.json()
+    except Exception:
+        registry.record_failure(proxy)
+        return
+    registry.record_success(proxy, latency=time.monotonic() - start)
+    item = item.with_price(PriceResponse.from_dict(**json_response))
+    if not item.price.success:
+        return
+    return item
@@ -0,0 +1,94 @@
+import logging
+import sys
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from enum import Enum
+from typing import Self
+
+from price_worker.price_parser import parse_price
+
+logger = logging.getLogger("price-worker")
+
+
+class Currency(Enum):
+    USD = 1
+    EUR = 3
+    RUB = 5
+    UAH = 18
+
+
+@dataclass(frozen=True, slots=True)
+class PriceResponse:
+    lowest_price: str | None = None
+    median_price: str | None = None
+    success: bool | None = None
+    volume: str | None = None
+
+    @classmethod
+    def from_dict(cls, **kwargs) -> Self:
+        return cls(**kwargs)
+
+
+@dataclass(frozen=True, slots=True)
+class MarketItem:
+    """
+    Item of a currency and its market price.
+
+    Items are immutable and compared by ``(name, currency)``. Names are
+    interned, so items of the same name in different currencies and
+    iterations share one string.
+    """
+
+    name: str
+    currency: Currency
+    price: PriceResponse | None = field(default=None, compare=False)
+    value: Decimal | None = field(default=None, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "name", sys.intern(self.name))
+
+    @property
+    def key(self) -> tuple[str, Currency]:
+        return self.name, self.currency
+
+    def with_price(self, price: PriceResponse) -> Self:
+        """
+        Return the item with market response and its price parsed once.
+
+        Prices that can't be parsed are logged and the item is treated as
+        one without a market price.
+        """
+        price_string = price.lowest_price or price.median_price
+        value = None
+        if price.success and price_string:
+            try:
+                value = parse_price(price_string, self.currency)
+            except ValueError:
+                logger.warning(f"[{self.name}] --> invalid price")
+        return replace(self, price=price, value=value)
+
+    @property
+    def has_price(self) -> bool:
+        return self.value is not None
+
+    @property
+    def success_no_price(self) -> bool:
+        return bool(self.price and self.price.success and self.value is None)
+
+    @property
+    def price_string(self) -> str | None:
+        if not self.price:
+            return
+        return self.price.lowest_price or self.price.median_price
+
+    @property
+    def price_float(self) -> float | None:
+        if self.value is None:
+            return
+        return float(self.value)
+
+    def __str__(self):
+        if self.has_price:
+            return f"[{self.name}] --> [{self.price_string}]"
+        else:
+            return f"[{self.name}] --> NO PRICE"
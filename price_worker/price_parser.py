@@ -0,0 +1,60 @@
+import re
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from price_worker.models import Currency
+
+_SPACES = " \xa0 "
+_NUMBER = re.compile(r"\d+(?:\.\d{1,2})?")
+
+
+class PriceFormat:
+    """
+    Format of prices that Steam returns in a currency.
+
+    Args:
+        symbol (str): regex of the currency symbol
+        decimal (str): decimal separator
+        thousands (str): thousands separators
+    """
+
+    __slots__ = ("_symbol", "_decimal", "_no_cents", "_separators")
+
+    def __init__(self, symbol: str, decimal: str, thousands: str):
+        self._symbol = re.compile(rf"\s*(?:{symbol})\s*")
+        self._decimal = decimal
+        # "12,--€" is Valve's way to write "12,00€", dashes anywhere else
+        # are not a price
+        self._no_cents = re.compile(rf"(?<=\d){re.escape(decimal)}--$")
+        self._separators = str.maketrans(
+            {**dict.fromkeys(thousands), decimal: "."}
+        )
+
+    def parse(self, value: str) -> Decimal:
+        number = self._symbol.sub("", value)
+        number = self._no_cents.sub(f"{self._decimal}00", number)
+        number = number.translate(self._separators)
+        if not _NUMBER.fullmatch(number):
+            raise ValueError(f"Invalid price [{value}]")
+        return Decimal(number)
+
+
+# Formats by currency name
+PRICE_FORMATS = {
+    "USD": PriceFormat(r"\$|USD", decimal=".", thousands=","),
+    "EUR": PriceFormat("€", decimal=",", thousands="." + _SPACES),
+    # "pуб." with English "p" is returned sometimes (WTF Valve #3)
+    "RUB": PriceFormat(r"[рp]уб\.?", decimal=",", thousands="." + _SPACES),
+    "UAH": PriceFormat("₴", decimal=",", thousands="." + _SPACES),
+}
+
+
+def parse_price(value: str, currency: "Currency") -> Decimal:
+    """
+    Parse price string returned by Steam market.
+
+    Raises:
+        ValueError: the string is not a price in the currency format
+    """
+    return PRICE_FORMATS[currency.name].parse(value)
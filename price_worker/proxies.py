@@ -0,0 +1,376 @@
+import json
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Container, Self
+
+import httpx
+
+PROXIES_URL = os.getenv("PROXIES_URL")
+# Seconds during which the downloaded proxy list is used without checks
+PROXIES_TTL = int(os.getenv("PROXIES_TTL", 300))
+# Seconds to wait for the proxy list before the snapshot is used
+PROXIES_TIMEOUT = int(os.getenv("PROXIES_TIMEOUT", 5))
+# File with the last downloaded proxy list
+PROXIES_SNAPSHOT_FILE = os.getenv("PROXIES_SNAPSHOT_FILE", ".proxies.txt")
+# Connections kept open to Steam through a single proxy
+CONNECTIONS_PER_PROXY = int(os.getenv("CONNECTIONS_PER_PROXY", 2))
+# Upper bound of proxy clients (and their sockets) kept open at once
+MAX_OPEN_CLIENTS = int(os.getenv("MAX_OPEN_CLIENTS", 100))
+# Seconds after which an unused proxy client is closed
+CLIENT_IDLE_TIMEOUT = int(os.getenv("CLIENT_IDLE_TIMEOUT", 120))
+# File where proxy health scores are kept between runs
+PROXY_STATS_FILE = os.getenv("PROXY_STATS_FILE", ".proxy-stats.json")
+# Seconds after which stats of a proxy that was not used are dropped
+PROXY_STATS_TTL = 7 * 24 * 3600
+# Weight of the latest request in success rate and latency EWMA
+EWMA_ALPHA = 0.3
+# Backoff of a failed proxy in seconds, doubled on every failure in a row
+BACKOFF_BASE = 5
+BACKOFF_MAX = 600
+RATE_LIMIT_BACKOFF_FACTOR = 4
+# Share of requests sent to a random proxy to keep the scores up to date
+EXPLORATION_RATE = 0.1
+
+logger = logging.getLogger("price-worker")
+
+
+class _PooledClient:
+    __slots__ = ("client", "last_used", "in_use")
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class ProxyClientPool:
+    """
+    Long-lived ``httpx.AsyncClient`` per proxy.
+
+    Clients keep their connections alive between requests, so the TCP and
+    TLS handshakes through a proxy are paid once and not for every request.
+    Clients that were not used for ``idle_timeout`` seconds are closed and
+    the number of open clients is kept under ``max_clients`` by closing the
+    least recently used idle ones.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = MAX_OPEN_CLIENTS,
+        connections_per_proxy: int = CONNECTIONS_PER_PROXY,
+        idle_timeout: float = CLIENT_IDLE_TIMEOUT,
+    ):
+        self.max_clients = max_clients
+        self.connections_per_proxy = connections_per_proxy
+        self.idle_timeout = idle_timeout
+        self._clients: dict[str, _PooledClient] = {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _create_client(self, proxy: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            proxy=f"http://{proxy}",
+            verify=False,
+            limits=httpx.Limits(
+                max_connections=self.connections_per_proxy,
+                max_keepalive_connections=self.connections_per_proxy,
+                keepalive_expiry=self.idle_timeout,
+            ),
+        )
+
+    async def _close(self, proxy: str) -> None:
+        pooled = self._clients.pop(proxy)
+        await pooled.client.aclose()
+
+    async def evict(self, reserve: int = 0) -> None:
+        """
+        Close idle clients that expired or exceed the open clients cap.
+
+        Args:
+            reserve (int): number of clients that are about to be opened
+        """
+        now = time.monotonic()
+        idle = sorted(
+            (
+                (pooled.last_used, proxy)
+                for proxy, pooled in self._clients.items()
+                if pooled.in_use == 0
+            )
+        )
+        overflow = len(self._clients) + reserve - self.max_clients
+        for last_used, proxy in idle:
+            if overflow <= 0 and now - last_used <= self.idle_timeout:
+                continue
+            pooled = self._clients.get(proxy)
+            # The client could be taken while another one was closing
+            if pooled is None or pooled.in_use:
+                continue
+            await self._close(proxy)
+            overflow -= 1
+
+    @asynccontextmanager
+    async def client(self, proxy: str) -> AsyncIterator[httpx.AsyncClient]:
+        pooled = self._clients.get(proxy)
+        if pooled is None:
+            if len(self._clients) >= self.max_clients:
+                await self.evict(reserve=1)
+            pooled = self._clients.get(proxy)
+        if pooled is None:
+            pooled = self._clients[proxy] = _PooledClient(
+                self._create_client(proxy)
+            )
+        pooled.in_use += 1
+        try:
+            yield pooled.client
+        finally:
+            pooled.in_use -= 1
+            pooled.last_used = time.monotonic()
+
+    async def aclose(self) -> None:
+        for proxy in list(self._clients):
+            await self._close(proxy)
+
+
+class ProxyStats:
+    """
+    Health of a single proxy.
+
+    Attributes:
+        success_rate (float): EWMA of successful requests share
+        latency (float): EWMA of successful requests latency in seconds
+        failures (int): failures in a row since the last success
+        retry_at (float): unix time until which the proxy is backed off
+        updated (float): unix time of the last recorded request
+    """
+
+    __slots__ = ("success_rate", "latency", "failures", "retry_at", "updated")
+
+    def __init__(
+        self,
+        success_rate: float = 0.5,
+        latency: float = 1.0,
+        failures: int = 0,
+        retry_at: float = 0.0,
+        updated: float = 0.0,
+    ):
+        self.success_rate = success_rate
+        self.latency = latency
+        self.failures = failures
+        self.retry_at = retry_at
+        self.updated = updated
+
+    @property
+    def score(self) -> float:
+        return self.success_rate / max(self.latency, 0.05)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Self:
+        return cls(**data)
+
+
+class ProxyRegistry:
+    """
+    Health scores of proxies that are kept between iterations and runs.
+
+    Every request outcome updates the proxy success rate and latency EWMA.
+    Failed proxies are backed off exponentially (longer when Steam answered
+    with 429) and new requests go to the best scoring proxies first.
+    """
+
+    def __init__(self, path: str | None = PROXY_STATS_FILE):
+        self.path = path
+        self.proxies: list[str] = []
+        self.stats: dict[str, ProxyStats] = {}
+
+    def update(self, proxies: list[str]) -> None:
+        """Replace proxies in use keeping the known stats."""
+        self.proxies = list(dict.fromkeys(proxies))
+        for proxy in self.proxies:
+            self.stats.setdefault(proxy, ProxyStats())
+
+    def record_success(self, proxy: str, latency: float) -> None:
+        stats = self.stats.setdefault(proxy, ProxyStats())
+        stats.success_rate += EWMA_ALPHA * (1 - stats.success_rate)
+        stats.latency += EWMA_ALPHA * (latency - stats.latency)
+        stats.failures = 0
+        stats.retry_at = 0.0
+        stats.updated = time.time()
+
+    def record_failure(self, proxy: str, rate_limited: bool = False) -> None:
+        stats = self.stats.setdefault(proxy, ProxyStats())
+        stats.success_rate -= EWMA_ALPHA * stats.success_rate
+        stats.failures += 1
+        backoff = BACKOFF_BASE * 2 ** (stats.failures - 1)
+        if rate_limited:
+            backoff *= RATE_LIMIT_BACKOFF_FACTOR
+        stats.updated = time.time()
+        stats.retry_at = stats.updated + min(backoff, BACKOFF_MAX)
+
+    def choose(
+        self, available: Callable[[str], bool], tried: Container[str] = ()
+    ) -> str | None:
+        """
+        Choose the best scoring proxy.
+
+        Proxies that were already tried or are backed off are used only when
+        there is nothing else available. A small share of requests goes to a
+        random proxy, so proxies with outdated scores get a chance.
+
+        Args:
+            available: predicate that tells whether the proxy can take
+                one more request
+            tried: proxies that should be avoided
+
+        Returns:
+            str | None: proxy or ``None`` if no proxy is available
+        """
+        now = time.time()
+        explore = random.random() < EXPLORATION_RATE
+        best, best_rank = None, None
+        for proxy in self.proxies:
+            if not available(proxy):
+                continue
+            stats = self.stats[proxy]
+            ready = stats.retry_at <= now
+            rank = (
+                proxy not in tried,
+                ready,
+                random.random() if explore else 0.0,
+                stats.score if ready else -stats.retry_at,
+            )
+            if best_rank is None or rank > best_rank:
+                best, best_rank = proxy, rank
+        return best
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.stats.update(
+                (proxy, ProxyStats.from_dict(stats))
+                for proxy, stats in data.items()
+            )
+        except (OSError, ValueError, TypeError):
+            logger.warning(f"Failed to load proxy stats from [{self.path}]")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        expired = time.time() - PROXY_STATS_TTL
+        data = {
+            proxy: stats.to_dict()
+            for proxy, stats in self.stats.items()
+            if stats.updated >= expired or proxy in self.proxies
+        }
+        try:
+            with open(self.path, "w") as f:
+                json.dump(data, f)
+        except OSError:
+            logger.warning(f"Failed to save proxy stats to [{self.path}]")
+
+
+def parse_proxies(text: str) -> list[str]:
+    return list(
+        map(
+            lambda x: ":".join(x.removeprefix("http://").split(":")[0:2]),
+            text.splitlines(),
+        )
+    )
+
+
+class ProxyListCache:
+    """
+    Proxy list shared between iterations.
+
+    The list is downloaded again only after ``ttl`` seconds and then
+    revalidated with ``If-None-Match``/``If-Modified-Since``, so an
+    unchanged list is not transferred again. Every downloaded list is saved
+    to ``snapshot`` file, which is used when the source is slow or down.
+    """
+
+    def __init__(
+        self,
+        url: str | None = PROXIES_URL,
+        ttl: float = PROXIES_TTL,
+        snapshot: str | None = PROXIES_SNAPSHOT_FILE,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.snapshot = snapshot
+        self.proxies: list[str] = []
+        self._fetched: float | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._client = httpx.AsyncClient(timeout=PROXIES_TIMEOUT)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _load_snapshot(self) -> list[str]:
+        if not self.snapshot or not os.path.exists(self.snapshot):
+            return []
+        try:
+            with open(self.snapshot) as f:
+                return f.read().splitlines()
+        except OSError:
+            logger.warning(f"Failed to load proxies from [{self.snapshot}]")
+            return []
+
+    def _save_snapshot(self) -> None:
+        if not self.snapshot:
+            return
+        try:
+            with open(self.snapshot, "w") as f:
+                f.write("\n".join(self.proxies))
+        except OSError:
+            logger.warning(f"Failed to save proxies to [{self.snapshot}]")
+
+    async def get(self) -> list[str]:
+        now = time.monotonic()
+        if self._fetched is not None and now - self._fetched < self.ttl:
+            return self.proxies
+        headers = {}
+        if self.proxies and self._etag:
+            headers["If-None-Match"] = self._etag
+        if self.proxies and self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+        try:
+            response = await self._client.get(self.url, headers=headers)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except httpx.HTTPError:
+            logger.warning("Failed to download proxies, using the last ones")
+            if not self.proxies:
+                self.proxies = self._load_snapshot()
+            # Try the source again on the next call
+            self._fetched = None
+            return self.proxies
+        self._fetched = now
+        if response.status_code == 304:
+            return self.proxies
+        self.proxies = parse_proxies(response.text)
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        self._save_snapshot()
+        return self.proxies
@@ -0,0 +1,138 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    TypeVar,
+)
+
+from price_worker.proxies import CONNECTIONS_PER_PROXY, ProxyRegistry
+
+# Requests sent to Steam at the same time
+REQUEST_CONCURRENCY = int(os.getenv("REQUEST_CONCURRENCY", 100))
+# Requests sent through a single proxy at the same time
+PROXY_CONCURRENCY = int(os.getenv("PROXY_CONCURRENCY", CONNECTIONS_PER_PROXY))
+# Requests for the same item that are in flight at the same time
+HEDGED_REQUESTS = int(os.getenv("HEDGED_REQUESTS", 2))
+# Seconds to wait for a response before sending a duplicate request
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", 3))
+
+T = TypeVar("T")
+
+
+class RequestScheduler(Generic[T]):
+    """
+    Sends price requests with bounded concurrency.
+
+    Every item gets up to ``attempts`` requests through different proxies,
+    the best scoring proxies of the registry are used first.
+    The next request is sent when the previous one failed or did not answer
+    within ``hedge_delay`` seconds, with at most ``hedged`` of them in flight.
+    As soon as one request succeeds the rest of the item's requests are
+    cancelled, so a healthy proxy costs one request per item instead of
+    ``attempts``.
+
+    Args:
+        fetch: coroutine function that requests an item through a proxy and
+            returns the priced item or ``None`` on failure
+        registry (ProxyRegistry): proxies to spread requests across
+        attempts (int): maximum number of requests per item
+        concurrency (int): maximum number of requests in flight
+        proxy_concurrency (int): maximum number of requests in flight
+            through a single proxy
+        hedged (int): maximum number of requests in flight per item
+        hedge_delay (float): seconds to wait before a duplicate request
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[T, str], Awaitable[T | None]],
+        registry: ProxyRegistry,
+        attempts: int,
+        concurrency: int = REQUEST_CONCURRENCY,
+        proxy_concurrency: int = PROXY_CONCURRENCY,
+        hedged: int = HEDGED_REQUESTS,
+        hedge_delay: float = HEDGE_DELAY,
+    ):
+        self.fetch = fetch
+        self.registry = registry
+        self.attempts = attempts
+        self.concurrency = concurrency
+        self.proxy_concurrency = proxy_concurrency
+        self.hedged = max(1, min(hedged, attempts))
+        self.hedge_delay = hedge_delay
+        self._requests = asyncio.Semaphore(concurrency)
+        self._proxy_released = asyncio.Condition()
+        self._in_flight = dict.fromkeys(registry.proxies, 0)
+        self.requests_sent = 0
+
+    def _is_free(self, proxy: str) -> bool:
+        return self._in_flight[proxy] < self.proxy_concurrency
+
+    @asynccontextmanager
+    async def _proxy_slot(self, tried: set[str]) -> AsyncIterator[str]:
+        async with self._requests:
+            async with self._proxy_released:
+                proxy = await self._proxy_released.wait_for(
+                    lambda: self.registry.choose(self._is_free, tried)
+                )
+                self._in_flight[proxy] += 1
+                tried.add(proxy)
+            try:
+                yield proxy
+            finally:
+                async with self._proxy_released:
+                    self._in_flight[proxy] -= 1
+                    self._proxy_released.notify()
+
+    async def _attempt(self, item: T, tried: set[str]) -> T | None:
+        async with self._proxy_slot(tried) as proxy:
+            self.requests_sent += 1
+            return await self.fetch(item, proxy)
+
+    async def _fetch_item(self, item: T) -> T | None:
+        pending: set[asyncio.Task] = set()
+        tried: set[str] = set()
+        attempts = 0
+        try:
+            while attempts < self.attempts or pending:
+                if attempts < self.attempts and len(pending) < self.hedged:
+                    pending.add(
+                        asyncio.create_task(self._attempt(item, tried))
+                    )
+                    attempts += 1
+                can_hedge = (
+                    attempts < self.attempts and len(pending) < self.hedged
+                )
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if (result := task.result()) is not None:
+                        return result
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def run(self, items: Iterable[T]) -> list[T]:
+        """Request all items and return the ones that were received."""
+        if not self.registry.proxies:
+            return []
+        items = iter(items)
+        results = []
+
+        async def worker():
+            for item in items:
+                if (result := await self._fetch_item(item)) is not None:
+                    results.append(result)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return results
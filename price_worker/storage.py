@@ -0,0 +1,267 @@
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Self
+
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Select,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import BIT, insert
+
+from bot.db import (
+    PRICE_UPDATES_CHANNEL,
+    Deal,
+    Item,
+    Price,
+    PriceHistory,
+    get_async_session,
+)
+from price_worker.models import Currency, MarketItem
+
+# Rows per INSERT statement, asyncpg allows up to 32767 query arguments
+UPSERT_BATCH_SIZE = 5000
+# Names per SELECT statement when the index is loaded
+LOAD_BATCH_SIZE = 10000
+
+# Bytes of a price updates notification, Postgres allows up to 8000
+NOTIFY_PAYLOAD_SIZE = 7500
+# Lock that serializes creation of price history partitions by workers
+HISTORY_PARTITION_LOCK = 0x70686973
+
+PriceKey = tuple[str, Currency]
+
+_history_partitions: set[date] = set()
+
+
+def parse_currency(value: str) -> Currency | None:
+    """
+    Parse currency stored in ``prices`` table.
+
+    Earlier versions of the worker inserted the Steam currency code
+    (``"1"``) instead of the currency name (``"USD"``), both are accepted.
+    """
+    if value in Currency.__members__:
+        return Currency[value]
+    try:
+        return Currency(int(value))
+    except ValueError:
+        return None
+
+
+def name_hash(name: ColumnElement[str]) -> ColumnElement[int]:
+    """Stable non-negative hash of item name computed by Postgres."""
+    return cast(
+        cast(
+            literal("x").op("||")(func.substr(func.md5(name), 1, 7)), BIT(28)
+        ),
+        Integer,
+    )
+
+
+def open_items_query() -> Select:
+    """Distinct ``(name, currency)`` of items that are held by clients."""
+    return (
+        select(Item.name, Deal.deal_currency)
+        .where(Item.id == Deal.item_id, Item.count > 0, Deal.closed.is_(False))
+        .group_by(Item.name, Deal.deal_currency)
+        .order_by(Item.name, Deal.deal_currency)
+    )
+
+
+async def get_open_items(*criteria: ColumnElement[bool]) -> list[MarketItem]:
+    """
+    Open items that match the criteria.
+
+    Criteria are applied before grouping, so only the matching deals are
+    aggregated by a single query.
+    """
+    async with get_async_session() as session:
+        rows = await session.execute(open_items_query().where(*criteria))
+    return [
+        MarketItem(name=name, currency=Currency[currency])
+        for name, currency in rows
+    ]
+
+
+async def get_open_items_demand() -> dict[PriceKey, int]:
+    """Number of open deals for every open ``(name, currency)``."""
+    query = open_items_query().add_columns(func.count(Deal.id))
+    async with get_async_session() as session:
+        return {
+            (name, Currency[currency]): deals
+            for name, currency, deals in await session.execute(query)
+        }
+
+
+async def ensure_history_partition(when: datetime) -> None:
+    """Create ``price_history`` partition for the month of given time."""
+    start = when.date().replace(day=1)
+    if start in _history_partitions:
+        return
+    end = (start + timedelta(days=32)).replace(day=1)
+    async with get_async_session() as session:
+        await session.execute(
+            select(func.pg_advisory_xact_lock(HISTORY_PARTITION_LOCK))
+        )
+        await session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS price_history_{start:%Y_%m} "
+                f"PARTITION OF {PriceHistory.__tablename__} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
+    _history_partitions.add(start)
+
+
+def price_update_payloads(rows: Iterable[dict]) -> Iterator[str]:
+    """Split updated prices into JSON payloads that fit a notification."""
+    chunk, size = [], 2
+    for row in rows:
+        entry = json.dumps(
+            [row["name"], row["currency"], row["price"]], ensure_ascii=False
+        )
+        entry_size = len(entry.encode()) + 1
+        if chunk and size + entry_size > NOTIFY_PAYLOAD_SIZE:
+            yield f"[{','.join(chunk)}]"
+            chunk, size = [], 2
+        chunk.append(entry)
+        size += entry_size
+    if chunk:
+        yield f"[{','.join(chunk)}]"
+
+
+@dataclass(slots=True)
+class PriceRecord:
+    price: float
+    updated: datetime
+
+
+class PriceIndex:
+    """
+    In-memory ``(name, currency) -> price`` map of the worker items.
+
+    The index is loaded once at startup, so writes are resolved without
+    querying ``prices`` table for every item. Rows stored with a legacy
+    currency code are remembered and replaced by the next write of the same
+    item.
+    """
+
+    def __init__(self):
+        self.prices: dict[PriceKey, PriceRecord] = {}
+        self.legacy: dict[PriceKey, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __contains__(self, key: PriceKey) -> bool:
+        return key in self.prices
+
+    def get(self, key: PriceKey) -> PriceRecord | None:
+        return self.prices.get(key)
+
+    def add(self, price: Price) -> None:
+        currency = parse_currency(price.currency)
+        if currency is None:
+            return
+        key = (price.name, currency)
+        if price.currency == currency.name:
+            self.prices[key] = PriceRecord(price.price, price.updated)
+        else:
+            self.legacy.setdefault(key, []).append(price.id)
+
+    @classmethod
+    async def load(cls, names: Iterable[str]) -> Self:
+        index = cls()
+        await index.refresh(names)
+        return index
+
+    async def refresh(self, names: Iterable[str]) -> None:
+        """Load current prices of the items with given names."""
+        names = sorted(set(names))
+        async with get_async_session() as session:
+            for i in range(0, len(names), LOAD_BATCH_SIZE):
+                prices = await session.scalars(
+                    select(Price).where(
+                        Price.name.in_(names[i : i + LOAD_BATCH_SIZE])
+                    )
+                )
+                for price in prices:
+                    self.add(price)
+
+    async def save(self, items: Iterable[MarketItem]) -> None:
+        """Upsert prices of items in one transaction."""
+        await self.save_prices((item.key, item.price_float) for item in items)
+
+    async def save_prices(self, prices: Iterable[tuple[PriceKey, float]]):
+        """
+        Upsert prices in one transaction.
+
+        Rows are written in key order, so workers that update overlapping
+        prices at the same time lock them in the same order. Every price is
+        also appended to ``price_history`` and sent to
+        ``PRICE_UPDATES_CHANNEL`` when the transaction is committed.
+        """
+        updated = datetime.now()
+        rows = {
+            key: {
+                "name": key[0],
+                "currency": key[1].name,
+                "price": price,
+                "updated": updated,
+            }
+            for key, price in prices
+        }
+        if not rows:
+            return
+        keys = sorted(rows, key=lambda k: (k[0], k[1].name))
+        legacy_ids = [
+            price_id for key in keys for price_id in self.legacy.get(key, ())
+        ]
+        await ensure_history_partition(updated)
+        async with get_async_session() as session:
+            if legacy_ids:
+                await session.execute(
+                    delete(Price).where(Price.id.in_(legacy_ids))
+                )
+            for i in range(0, len(keys), UPSERT_BATCH_SIZE):
+                stmt = insert(Price).values(
+                    [rows[key] for key in keys[i : i + UPSERT_BATCH_SIZE]]
+                )
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        constraint="_name_currency_uc",
+                        set_={
+                            "price": stmt.excluded.price,
+                            "updated": stmt.excluded.updated,
+                        },
+                    )
+                )
+            for i in range(0, len(keys), UPSERT_BATCH_SIZE):
+                await session.execute(
+                    insert(PriceHistory).values(
+                        [
+                            {
+                                "name": rows[key]["name"],
+                                "currency": rows[key]["currency"],
+                                "price": rows[key]["price"],
+                                "measure_time": updated,
+                            }
+                            for key in keys[i : i + UPSERT_BATCH_SIZE]
+                        ]
+                    )
+                )
+            for payload in price_update_payloads(rows[key] for key in keys):
+                await session.execute(
+                    select(func.pg_notify(PRICE_UPDATES_CHANNEL, payload))
+                )
+        for key in keys:
+            self.prices[key] = PriceRecord(rows[key]["price"], updated)
+            self.legacy.pop(key, None)
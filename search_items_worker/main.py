@@ -3,9 +3,9 @@ import logging
 
 import httpx
 from dotenv import load_dotenv
-from sqlalchemy import select
+from sqlalchemy import func, select
 
-from bot.db import get_async_session, SearchItem
+from bot.db import SEARCH_ITEMS_CHANNEL, get_async_session, SearchItem
 
 load_dotenv()
 
@@ -34,6 +34,10 @@ async def main() -> None:
             session.add_all(
                 SearchItem(name=name, image_url=data[name]) for name in diff
             )
+            # Sent to listeners when new items are committed
+            await session.execute(
+                select(func.pg_notify(SEARCH_ITEMS_CHANNEL, str(len(diff))))
+            )
             logger.info(f"Found {len(diff)} new items")
             logger.info("\n".join(diff))
         else:
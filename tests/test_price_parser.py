@@ -0,0 +1,129 @@
+import random
+import unittest
+from decimal import Decimal
+
+from price_worker.models import Currency
+from price_worker.price_parser import parse_price
+
+NBSP = "\xa0"
+NNBSP = " "
+
+FUZZ_ROUNDS = 5000
+
+
+def format_price(
+    value: Decimal,
+    symbol: str,
+    decimal: str,
+    thousands: str,
+    prefix: bool = False,
+    space: str = "",
+    dashes: bool = False,
+) -> str:
+    """Write a price the way Steam market does."""
+    integer, cents = f"{value:.2f}".split(".")
+    groups = []
+    while len(integer) > 3:
+        integer, group = integer[:-3], integer[-3:]
+        groups.insert(0, group)
+    number = thousands.join([integer, *groups])
+    number += decimal + ("--" if dashes and cents == "00" else cents)
+    return f"{symbol}{space}{number}" if prefix else f"{number}{space}{symbol}"
+
+
+class ValveFormatsTest(unittest.TestCase):
+    def test_formats(self):
+        cases = [
+            ("$1,234.56", Currency.USD, "1234.56"),
+            ("$0.03", Currency.USD, "0.03"),
+            ("$12.-- USD", Currency.USD, "12.00"),
+            ("1.234,56€", Currency.EUR, "1234.56"),
+            ("12,--€", Currency.EUR, "12.00"),
+            ("0,5€", Currency.EUR, "0.5"),
+            (f"1{NBSP}234,56€", Currency.EUR, "1234.56"),
+            ("1 234,56 руб.", Currency.RUB, "1234.56"),
+            ("1 234,56 pуб.", Currency.RUB, "1234.56"),
+            (f"12{NNBSP}345,-- руб.", Currency.RUB, "12345.00"),
+            ("1.234,50₴", Currency.UAH, "1234.50"),
+            (f"1{NNBSP}234₴", Currency.UAH, "1234"),
+        ]
+        for value, currency, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(
+                    parse_price(value, currency), Decimal(expected)
+                )
+
+    def test_invalid(self):
+        cases = [
+            ("", Currency.USD),
+            ("-", Currency.USD),
+            ("--", Currency.EUR),
+            ("1-2", Currency.EUR),
+            (",--€", Currency.EUR),
+            ("1,-€", Currency.EUR),
+            ("-1,00€", Currency.EUR),
+            ("12,--5€", Currency.EUR),
+            ("1,234", Currency.EUR),
+            ("$1.2.3", Currency.USD),
+            ("abc руб.", Currency.RUB),
+        ]
+        for value, currency in cases:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_price(value, currency)
+
+
+class FuzzTest(unittest.TestCase):
+    """Prices written by a formatter are parsed back to the same value."""
+
+    FORMATS = {
+        Currency.USD: [
+            dict(symbol="$", decimal=".", thousands=",", prefix=True)
+        ],
+        Currency.EUR: [
+            dict(symbol="€", decimal=",", thousands=thousands)
+            for thousands in (".", " ", NBSP, NNBSP)
+        ],
+        Currency.RUB: [
+            dict(symbol=symbol, decimal=",", thousands=thousands, space=" ")
+            for symbol in ("руб.", "pуб.")
+            for thousands in (" ", NBSP, NNBSP)
+        ],
+        Currency.UAH: [
+            dict(symbol="₴", decimal=",", thousands=thousands)
+            for thousands in (".", " ", NBSP, NNBSP)
+        ],
+    }
+
+    def test_round_trip(self):
+        rng = random.Random(2026)
+        for _ in range(FUZZ_ROUNDS):
+            currency = rng.choice(list(self.FORMATS))
+            price_format = rng.choice(self.FORMATS[currency])
+            integer = rng.randrange(10 ** rng.randint(1, 9))
+            cents = rng.choice([0, rng.randrange(100)])
+            value = Decimal(integer * 100 + cents) / 100
+            text = format_price(
+                value, dashes=rng.random() < 0.5, **price_format
+            )
+            with self.subTest(text=text):
+                self.assertEqual(parse_price(text, currency), value)
+
+    def test_garbage(self):
+        """Random strings are either rejected or parsed to a price."""
+        rng = random.Random(2026)
+        alphabet = "0123456789.,- $€₴рpуб" + NBSP + NNBSP
+        for _ in range(FUZZ_ROUNDS):
+            text = "".join(rng.choices(alphabet, k=rng.randint(0, 12)))
+            for currency in Currency:
+                try:
+                    price = parse_price(text, currency)
+                except ValueError:
+                    continue
+                self.assertGreaterEqual(price, 0, text)
+                # Only "--" cents can be parsed
+                self.assertIn(text.count("-"), (0, 2), text)
+
+
+if __name__ == "__main__":
+    unittest.main()